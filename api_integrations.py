@@ -1,7 +1,14 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from config import *
 
@@ -58,6 +65,13 @@ MOCK_DATA = {
 }
 
 # API Configuration
+def mock_products(brand: str, category: str = None, limit: int = 10) -> Dict:
+    """A brand's MOCK_DATA products in the shape get_products() returns"""
+    products = MOCK_DATA[brand]["products"]
+    if category:
+        products = [p for p in products if p["category"] == category]
+    return {"products": products[:limit]}
+
 class APIConfig:
     def __init__(self):
         self.NIKE_API_KEY = NIKE_API_KEY
@@ -72,124 +86,617 @@ class APIConfig:
         self.GOOGLE_MAPS_BASE_URL = GOOGLE_MAPS_BASE_URL
         self.GOOGLE_PAY_BASE_URL = GOOGLE_PAY_BASE_URL
 
+# Cache lifetimes (seconds) by client method; anything else uses CACHE_TIMEOUT
+CACHE_TTLS = {
+    "check_availability": STOCK_CACHE_TIMEOUT,
+    "check_stock": STOCK_CACHE_TIMEOUT,
+    "get_product_details": DETAILS_CACHE_TIMEOUT,
+    "get_store_details": DETAILS_CACHE_TIMEOUT,
+    "get_directions": 0  # Never cached
+}
+
+def parse_hedged_operations(spec: str) -> Dict[str, Optional[float]]:
+    """Parse a HEDGE_OPERATIONS string such as "get_products,nike.get_product_details=0.5"
+    into {operation: fixed hedge delay in seconds, or None for the observed HEDGE_PERCENTILE latency}"""
+    operations = {}
+    for entry in spec.split(","):
+        name, _, delay = entry.partition("=")
+        if name.strip():
+            operations[name.strip()] = float(delay) if delay.strip() else None
+    return operations
+
+# Operations that may be hedged when HEDGE_REQUESTS is on
+HEDGED_OPERATIONS = parse_hedged_operations(HEDGE_OPERATIONS)
+
+# Response Cache
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of vendor responses keyed on (url, params).
+
+    Expired entries are not returned by get() but stay in the cache until LRU
+    eviction pushes them out, so they can still serve as a stale fallback.
+    Cached responses are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, max_items: int = MAX_CACHE_ITEMS, default_ttl: float = CACHE_TIMEOUT,
+                 ttls: Dict[str, float] = None):
+        self.max_items = max_items
+        self.default_ttl = default_ttl
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(url: str, params: Dict = None) -> Tuple:
+        return (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+    def ttl_for(self, operation: str) -> float:
+        """TTL for an operation name such as 'nike.check_availability'"""
+        return self.ttls.get(operation.rsplit(".", 1)[-1], self.default_ttl)
+
+    def get(self, key: Tuple, allow_stale: bool = False) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (not allow_stale and entry[0] < time.monotonic()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple, value: Dict, ttl: float = None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_items": self.max_items
+            }
+
+# Rate Limiting
+class RateLimiter:
+    """Token bucket allowing `calls` requests per `period` seconds, refilled continuously.
+
+    Thread-safe. With a `store_path` the bucket lives in a SQLite file, so all
+    processes on the host draw from one budget per vendor.
+    """
+    def __init__(self, name: str, calls: int = RATE_LIMIT_CALLS, period: float = RATE_LIMIT_PERIOD,
+                 store_path: str = RATE_LIMIT_STORE):
+        self.name = name
+        self.capacity = float(calls)
+        self.rate = calls / period  # Tokens per second
+        self.store_path = store_path
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        if store_path:
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.store_path, timeout=5)
+
+    def _refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _take(self, count: float = 1, force: bool = False) -> float:
+        """Take `count` tokens if available (always with force=True, going into debt);
+        return 0, or the seconds until they will be"""
+        now = time.time()
+        if not self.store_path:
+            with self._lock:
+                self._tokens = self._refill(self._tokens, self._updated, now)
+                self._updated = now
+                if self._tokens >= count or force:
+                    self._tokens -= count
+                    return 0.0
+                return (count - self._tokens) / self.rate
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Serialise the read-modify-write across processes
+            row = conn.execute("SELECT tokens, updated FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            tokens = self._refill(*row, now) if row else self.capacity
+            wait = 0.0
+            if tokens >= count or force:
+                tokens -= count
+            else:
+                wait = (count - tokens) / self.rate
+            conn.execute("INSERT OR REPLACE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)",
+                         (self.name, tokens, now))
+            conn.commit()
+            return wait
+        finally:
+            conn.close()
+
+    def try_acquire(self) -> bool:
+        return self._take() == 0
+
+    def charge(self, count: int):
+        """Take `count` tokens for calls already made (e.g. retries), even if that overdraws the bucket"""
+        if count > 0:
+            self._take(count, force=True)
+
+    def acquire(self, timeout: float = RATE_LIMIT_MAX_WAIT) -> bool:
+        """Queue for up to `timeout` seconds for a token"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                return False
+            time.sleep(wait)
+
+# Circuit Breaking
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one vendor.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast. Once `reset_timeout` seconds have passed a single trial call is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the vendor now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # This caller makes the trial call
+                return True
+            return False  # Open, or a trial call is already in flight
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def cancel(self):
+        """Give back a trial call that was allowed but never made"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN  # The next caller gets the trial
+
+# Request Coalescing
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception). Once it
+    finishes the key is free again, so later calls run afresh.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # Calls answered by another caller's request
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+# Latency Tracking
+class LatencyTracker:
+    """Rolling window of recent request latencies per operation"""
+    def __init__(self, window: int = HEDGE_LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, latency: float):
+        with self._lock:
+            if operation not in self._samples:
+                self._samples[operation] = deque(maxlen=self.window)
+            self._samples[operation].append(latency)
+
+    def percentile(self, operation: str, percentile: float) -> Optional[float]:
+        """Latency below which `percentile`% of recent requests finished, or None with too few samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < max(self.min_samples, 1):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+# Shared HTTP Connection Pool
+class HTTPClient:
+    """Pooled keep-alive HTTP session shared by every vendor client.
+
+    GET requests are retried with exponential backoff on connection errors and
+    5xx responses, each retry taking a rate limit token. A 429 is returned
+    as is rather than retried, and POSTs are never retried. Every request has
+    a timeout.
+    Named operations also go through their vendor's circuit breaker, so a
+    vendor that keeps failing is skipped instead of tying up worker threads.
+    Identical GETs in flight at the same time share one upstream request.
+    Operations listed in `hedged` (HEDGED_OPERATIONS) that are still waiting
+    after their observed p95 latency get a second, identical request if the
+    vendor's rate limit has a token to spare and fewer than `max_hedges`
+    hedges are in flight; whichever answers first wins.
+    At most `pool_size` requests are in flight at once; a request that can't
+    get a connection within its timeout fails with a 503 APIError.
+    """
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_factor: float = HTTP_BACKOFF_FACTOR, timeout: float = HTTP_TIMEOUT,
+                 cache: ResponseCache = None, hedged: Dict[str, Optional[float]] = None,
+                 max_hedges: int = HEDGE_MAX_IN_FLIGHT):
+        self.timeout = timeout
+        self.cache = cache
+        self.hedged = (HEDGED_OPERATIONS if HEDGE_REQUESTS else {}) if hedged is None else hedged
+        self.latencies = LatencyTracker()
+        self.hedges = 0  # Second requests sent
+        self.hedge_wins = 0  # Second requests that answered first
+        self._stats_lock = threading.Lock()
+        # First requests of hedged operations; like hedges, they only run when a slot is free
+        self._request_executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="http-request")
+        self._request_slots = threading.BoundedSemaphore(pool_size)
+        # Hedges only; a free slot is required to send one, so they never queue
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max(max_hedges, 1), thread_name_prefix="http-hedge")
+        self._hedge_slots = threading.BoundedSemaphore(max(max_hedges, 1)) if max_hedges > 0 else None
+        self.rate_limiters: Dict[str, RateLimiter] = {}
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._limiters_lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self._connection_slots = threading.BoundedSemaphore(pool_size)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False  # Hand the final response back like a single request would
+        )
+        # _connection_slots keeps requests within the pool, so the pool never has to block (urllib3
+        # would wait for a connection with no timeout at all)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def rate_limiter(self, operation: str) -> Optional[RateLimiter]:
+        """The token bucket of the vendor an operation such as 'nike.get_products' belongs to"""
+        if not operation:
+            return None
+        vendor = operation.split(".", 1)[0]
+        with self._limiters_lock:
+            if vendor not in self.rate_limiters:
+                self.rate_limiters[vendor] = RateLimiter(vendor)
+            return self.rate_limiters[vendor]
+
+    def circuit_breaker(self, operation: str) -> Optional[CircuitBreaker]:
+        """The circuit breaker of the vendor an operation belongs to"""
+        if not operation:
+            return None
+        vendor = operation.split(".", 1)[0]
+        with self._limiters_lock:
+            if vendor not in self.circuit_breakers:
+                self.circuit_breakers[vendor] = CircuitBreaker(vendor)
+            return self.circuit_breakers[vendor]
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds to wait before hedging an operation, or None if it is not hedged (yet)"""
+        if not operation:
+            return None
+        method = operation.rsplit(".", 1)[-1]
+        if operation in self.hedged:
+            delay = self.hedged[operation]
+        elif method in self.hedged:
+            delay = self.hedged[method]
+        else:
+            return None
+        return self.latencies.percentile(operation, HEDGE_PERCENTILE) if delay is None else delay
+
+    def _send(self, breaker: Optional[CircuitBreaker], method: str, url: str, operation: str = None,
+              **kwargs) -> requests.Response:
+        """Make the request, recording connection errors and 5xx responses against the breaker"""
+        if not self._connection_slots.acquire(timeout=kwargs.get("timeout") or self.timeout):
+            # Busy here rather than a vendor failure, so the breaker is not charged
+            if breaker is not None:
+                breaker.cancel()
+            raise APIError(f"No free connection for {operation or url}", status_code=503)
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            self._connection_slots.release()
+        if operation:
+            self.latencies.record(operation, time.monotonic() - started)
+            # The limiter was charged for the first attempt; charge urllib3's retries too
+            retries = getattr(getattr(response, "raw", None), "retries", None)
+            if retries is not None and retries.history:
+                self.rate_limiter(operation).charge(len(retries.history))
+        if breaker is not None:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    def get(self, url: str, params: Dict = None, headers: Dict = None, timeout: float = None,
+            operation: str = None, fresh: bool = False) -> Dict:
+        """GET a JSON response; successful responses of named operations are cached.
+
+        With fresh=True a cached response is not used unless the vendor can't be
+        reached, but the new response still replaces it.
+
+        Named operations count against their vendor's rate limit. When the budget
+        is exhausted the call queues for up to RATE_LIMIT_MAX_WAIT seconds, then
+        falls back to an expired cached response before giving up. The same
+        stale fallback applies while the vendor's circuit is open; without one
+        the call fails fast with CircuitOpenError.
+        """
+        request_key = ResponseCache.make_key(url, params)
+        key = None
+        ttl = self.cache.ttl_for(operation) if operation and self.cache is not None else 0
+        if ttl > 0:
+            key = request_key
+            cached = None if fresh else self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Concurrent identical requests wait for this one instead of going upstream
+        return self.single_flight.do(request_key, lambda: self._fetch(url, params, headers, timeout, operation, key, ttl))
+
+    def _fetch(self, url: str, params: Dict, headers: Dict, timeout: float, operation: str,
+               key: Optional[Tuple], ttl: float) -> Dict:
+        breaker = self.circuit_breaker(operation)
+        if breaker is not None and not breaker.allow():
+            stale = self.cache.get(key, allow_stale=True) if key is not None else None
+            if stale is not None:
+                return stale
+            raise CircuitOpenError(breaker.name)
+
+        limiter = self.rate_limiter(operation)
+        if limiter is not None and not limiter.acquire():
+            if breaker is not None:
+                breaker.cancel()
+            stale = self.cache.get(key, allow_stale=True) if key is not None else None
+            if stale is not None:
+                return stale
+            raise APIError(f"Rate limit exhausted for {limiter.name}", status_code=429)
+
+        kwargs = {"params": params, "headers": headers, "timeout": timeout or self.timeout}
+        delay = self.hedge_delay(operation)
+        if delay is None or (breaker is not None and breaker.state != CircuitBreaker.CLOSED):
+            response = self._send(breaker, "GET", url, operation, **kwargs)
+        else:
+            response = self._send_hedged(delay, breaker, limiter, url, operation, **kwargs)
+        data = response.json()
+        if key is not None and response.ok:
+            self.cache.set(key, data, ttl)
+        return data
+
+    def _send_hedged(self, delay: float, breaker: Optional[CircuitBreaker], limiter: Optional[RateLimiter],
+                     url: str, operation: str, **kwargs) -> requests.Response:
+        """GET, and send the same GET again if no answer arrives within `delay` seconds.
+
+        The first request runs on the request executor when one of its
+        `pool_size` slots is free, and is simply sent without a hedge when none
+        is, so it never queues. The hedge needs a free hedge slot and a rate
+        limit token that is available right now; it never queues either. The
+        first request to return a response wins; the other is left to finish in
+        the background.
+        """
+        if not self._request_slots.acquire(blocking=False):
+            return self._send(breaker, "GET", url, operation, **kwargs)
+        first = self._request_executor.submit(self._send, breaker, "GET", url, operation, **kwargs)
+        first.add_done_callback(lambda _: self._request_slots.release())
+        done, _ = wait([first], timeout=delay)
+        if done or self._hedge_slots is None or not self._hedge_slots.acquire(blocking=False):
+            return first.result()
+        if limiter is not None and not limiter.try_acquire():
+            self._hedge_slots.release()
+            return first.result()
+
+        with self._stats_lock:
+            self.hedges += 1
+        second = self._hedge_executor.submit(self._send, breaker, "GET", url, operation, **kwargs)
+        second.add_done_callback(lambda _: self._hedge_slots.release())
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        with self._stats_lock:
+                            self.hedge_wins += 1
+                    return future.result()
+        return first.result()  # Both failed: raise the original request's error
+
+    def post(self, url: str, json: Dict = None, headers: Dict = None, timeout: float = None,
+             operation: str = None) -> Dict:
+        breaker = self.circuit_breaker(operation)
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(breaker.name)
+        limiter = self.rate_limiter(operation)
+        if limiter is not None and not limiter.acquire():
+            if breaker is not None:
+                breaker.cancel()
+            raise APIError(f"Rate limit exhausted for {limiter.name}", status_code=429)
+        response = self._send(breaker, "POST", url, operation, json=json, headers=headers, timeout=timeout or self.timeout)
+        return response.json()
+
+    def close(self):
+        self._request_executor.shutdown(wait=False)
+        self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
 # Nike API Integration
 class NikeAPI:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, http: HTTPClient = None):
         self.config = config
+        self.http = http or HTTPClient()
         self.headers = {
             "Authorization": f"Bearer {self.config.NIKE_API_KEY}",
             "Content-Type": "application/json"
         }
 
-    def get_products(self, category: str = None, limit: int = 10) -> List[Dict]:
-        """Fetch Nike products"""
+    def get_products(self, category: str = None, limit: int = 10, fresh: bool = False) -> List[Dict]:
+        """Fetch Nike products; fresh=True skips the response cache"""
         if MOCK_API_RESPONSES:
-            products = MOCK_DATA["nike"]["products"]
-            if category:
-                products = [p for p in products if p["category"] == category]
-            return {"products": products[:limit]}
+            return mock_products("nike", category, limit)
             
         endpoint = f"{self.config.NIKE_BASE_URL}/products"
         params = {"limit": limit}
         if category:
             params["category"] = category
         
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        try:
+            return self.http.get(endpoint, headers=self.headers, params=params, operation="nike.get_products",
+                                 fresh=fresh)
+        except CircuitOpenError as e:
+            # Vendor is down and nothing is cached: show sample products, flagged as such
+            return {**mock_products("nike", category, limit), "error": e.message}
 
     def get_product_details(self, product_id: str) -> Dict:
         """Get detailed information about a specific Nike product"""
         endpoint = f"{self.config.NIKE_BASE_URL}/products/{product_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, operation="nike.get_product_details")
 
     def check_availability(self, product_id: str, size: str) -> Dict:
         """Check if a specific Nike product is available in the given size"""
         endpoint = f"{self.config.NIKE_BASE_URL}/products/{product_id}/availability"
         params = {"size": size}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, params=params, operation="nike.check_availability")
 
 # Adidas API Integration
 class AdidasAPI:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, http: HTTPClient = None):
         self.config = config
+        self.http = http or HTTPClient()
         self.headers = {
             "Authorization": f"Bearer {self.config.ADIDAS_API_KEY}",
             "Content-Type": "application/json"
         }
 
-    def get_products(self, category: str = None, limit: int = 10) -> List[Dict]:
-        """Fetch Adidas products"""
+    def get_products(self, category: str = None, limit: int = 10, fresh: bool = False) -> List[Dict]:
+        """Fetch Adidas products; fresh=True skips the response cache"""
         if MOCK_API_RESPONSES:
-            products = MOCK_DATA["adidas"]["products"]
-            if category:
-                products = [p for p in products if p["category"] == category]
-            return {"products": products[:limit]}
+            return mock_products("adidas", category, limit)
             
         endpoint = f"{self.config.ADIDAS_BASE_URL}/products"
         params = {"limit": limit}
         if category:
             params["category"] = category
         
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        try:
+            return self.http.get(endpoint, headers=self.headers, params=params, operation="adidas.get_products",
+                                 fresh=fresh)
+        except CircuitOpenError as e:
+            # Vendor is down and nothing is cached: show sample products, flagged as such
+            return {**mock_products("adidas", category, limit), "error": e.message}
 
     def get_product_details(self, product_id: str) -> Dict:
         """Get detailed information about a specific Adidas product"""
         endpoint = f"{self.config.ADIDAS_BASE_URL}/products/{product_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, operation="adidas.get_product_details")
 
     def check_stock(self, product_id: str, size: str) -> Dict:
         """Check stock availability for an Adidas product"""
         endpoint = f"{self.config.ADIDAS_BASE_URL}/products/{product_id}/stock"
         params = {"size": size}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, params=params, operation="adidas.check_stock")
 
 # Puma API Integration
 class PumaAPI:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, http: HTTPClient = None):
         self.config = config
+        self.http = http or HTTPClient()
         self.headers = {
             "Authorization": f"Bearer {self.config.PUMA_API_KEY}",
             "Content-Type": "application/json"
         }
 
-    def get_products(self, category: str = None, limit: int = 10) -> List[Dict]:
-        """Fetch Puma products"""
+    def get_products(self, category: str = None, limit: int = 10, fresh: bool = False) -> List[Dict]:
+        """Fetch Puma products; fresh=True skips the response cache"""
         if MOCK_API_RESPONSES:
-            products = MOCK_DATA["puma"]["products"]
-            if category:
-                products = [p for p in products if p["category"] == category]
-            return {"products": products[:limit]}
+            return mock_products("puma", category, limit)
             
         endpoint = f"{self.config.PUMA_BASE_URL}/products"
         params = {"limit": limit}
         if category:
             params["category"] = category
         
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        try:
+            return self.http.get(endpoint, headers=self.headers, params=params, operation="puma.get_products",
+                                 fresh=fresh)
+        except CircuitOpenError as e:
+            # Vendor is down and nothing is cached: show sample products, flagged as such
+            return {**mock_products("puma", category, limit), "error": e.message}
 
     def get_product_details(self, product_id: str) -> Dict:
         """Get detailed information about a specific Puma product"""
         endpoint = f"{self.config.PUMA_BASE_URL}/products/{product_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, operation="puma.get_product_details")
 
     def check_availability(self, product_id: str, size: str) -> Dict:
         """Check product availability in the given size"""
         endpoint = f"{self.config.PUMA_BASE_URL}/products/{product_id}/availability"
         params = {"size": size}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
+        return self.http.get(endpoint, headers=self.headers, params=params, operation="puma.check_availability")
 
 # Google Maps Integration
 class GoogleMapsAPI:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, http: HTTPClient = None):
         self.config = config
+        self.http = http or HTTPClient()
         self.api_key = config.GOOGLE_MAPS_API_KEY
 
     def find_nearby_stores(self, latitude: float, longitude: float, radius: int = 5000) -> List[Dict]:
@@ -202,8 +709,7 @@ class GoogleMapsAPI:
             "keyword": "Quick Basket",
             "key": self.api_key
         }
-        response = requests.get(endpoint, params=params)
-        return response.json()
+        return self.http.get(endpoint, params=params, operation="google_maps.find_nearby_stores")
 
     def get_store_details(self, place_id: str) -> Dict:
         """Get detailed information about a specific store"""
@@ -213,8 +719,7 @@ class GoogleMapsAPI:
             "fields": "name,formatted_address,opening_hours,formatted_phone_number",
             "key": self.api_key
         }
-        response = requests.get(endpoint, params=params)
-        return response.json()
+        return self.http.get(endpoint, params=params, operation="google_maps.get_store_details")
 
     def get_directions(self, origin: str, destination: str) -> Dict:
         """Get directions to a store"""
@@ -224,13 +729,13 @@ class GoogleMapsAPI:
             "destination": destination,
             "key": self.api_key
         }
-        response = requests.get(endpoint, params=params)
-        return response.json()
+        return self.http.get(endpoint, params=params, operation="google_maps.get_directions")
 
 # Google Pay Integration
 class GooglePayAPI:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, http: HTTPClient = None):
         self.config = config
+        self.http = http or HTTPClient()
         self.merchant_id = config.GOOGLE_PAY_MERCHANT_ID
         self.base_url = config.GOOGLE_PAY_BASE_URL
 
@@ -249,8 +754,7 @@ class GooglePayAPI:
                 "currencyCode": currency
             }
         }
-        response = requests.post(endpoint, json=payload)
-        return response.json()
+        return self.http.post(endpoint, json=payload, operation="google_pay.create_payment_token")
 
     def process_payment(self, payment_token: str, amount: float) -> Dict:
         """Process a payment using Google Pay"""
@@ -260,34 +764,64 @@ class GooglePayAPI:
             "paymentToken": payment_token,
             "amount": amount
         }
-        response = requests.post(endpoint, json=payload)
-        return response.json()
+        return self.http.post(endpoint, json=payload, operation="google_pay.process_payment")
 
 # Main API Manager
 class APIManager:
     def __init__(self):
         self.config = APIConfig()
-        self.nike = NikeAPI(self.config)
-        self.adidas = AdidasAPI(self.config)
-        self.puma = PumaAPI(self.config)
-        self.google_maps = GoogleMapsAPI(self.config)
-        self.google_pay = GooglePayAPI(self.config)
-
-    def get_all_products(self, category: str = None, limit: int = 10) -> Dict[str, List[Dict]]:
-        """Fetch products from all brands"""
+        self.cache = ResponseCache()
+        self.http = HTTPClient(cache=self.cache)  # One connection pool and cache for every vendor client
+        self.nike = NikeAPI(self.config, self.http)
+        self.adidas = AdidasAPI(self.config, self.http)
+        self.puma = PumaAPI(self.config, self.http)
+        self.google_maps = GoogleMapsAPI(self.config, self.http)
+        self.google_pay = GooglePayAPI(self.config, self.http)
+
+        # Brand clients queried together by get_all_products()
+        self.brands = {
+            "nike": self.nike,
+            "adidas": self.adidas,
+            "puma": self.puma
+        }
+        self.executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix="vendor-api")
+
+    def get_all_products(self, category: str = None, limit: int = 10, timeout: float = None,
+                         fresh: bool = False) -> Dict[str, List[Dict]]:
+        """Fetch products from all brands concurrently.
+
+        Each brand gets up to `timeout` seconds (BRAND_REQUEST_TIMEOUT by default).
+        A brand that is slow or fails is returned as {"products": [], "error": ...}
+        so the other brands' results are still usable. fresh=True bypasses
+        cached responses.
+        """
         if MOCK_API_RESPONSES:
-            results = {}
-            for brand in ["nike", "adidas", "puma"]:
-                products = MOCK_DATA[brand]["products"]
-                if category:
-                    products = [p for p in products if p["category"] == category]
-                results[brand] = {"products": products[:limit]}
-            return results
+            return {brand: mock_products(brand, category, limit) for brand in ["nike", "adidas", "puma"]}
             
+        futures = {
+            brand: self.executor.submit(client.get_products, category, limit, fresh)
+            for brand, client in self.brands.items()
+        }
+        done, _ = wait(futures.values(), timeout=BRAND_REQUEST_TIMEOUT if timeout is None else timeout)
+
+        results = {}
+        for brand, future in futures.items():
+            if future not in done:
+                future.cancel()
+                results[brand] = {"products": [], "error": f"{brand} API timed out"}
+            elif future.exception() is not None:
+                results[brand] = {"products": [], "error": str(future.exception())}
+            else:
+                results[brand] = future.result()
+        return results
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters and size of the response cache, plus requests saved by coalescing and hedges sent"""
         return {
-            "nike": self.nike.get_products(category, limit),
-            "adidas": self.adidas.get_products(category, limit),
-            "puma": self.puma.get_products(category, limit)
+            **self.cache.stats(),
+            "coalesced": self.http.single_flight.coalesced,
+            "hedged": self.http.hedges,
+            "hedge_wins": self.http.hedge_wins
         }
 
     def check_product_availability(self, brand: str, product_id: str, size: str) -> Dict:
@@ -301,6 +835,55 @@ class APIManager:
         else:
             raise ValueError("Unsupported brand")
 
+    def check_bulk_availability(self, items: Iterable[Tuple[str, str, str]],
+                                timeout: float = None) -> Dict[Tuple[str, str, str], Dict]:
+        """Check many (brand, product_id, size) items at once.
+
+        Duplicate items are checked once, and the remaining checks run
+        concurrently on the shared executor (and through the response cache),
+        so a whole cart costs roughly one vendor round trip. Items that fail,
+        time out or name an unsupported brand map to {"error": ...}.
+        """
+        items = list(dict.fromkeys((brand.lower(), product_id, size) for brand, product_id, size in items))
+
+        if MOCK_API_RESPONSES:
+            results = {}
+            for brand, product_id, size in items:
+                products = {p["id"]: p for p in MOCK_DATA.get(brand, {}).get("products", [])}
+                product = products.get(product_id)
+                if product is None:
+                    results[(brand, product_id, size)] = {"error": f"Unknown {brand} product {product_id}"}
+                    continue
+                try:
+                    size_value = float(size)
+                except (TypeError, ValueError):
+                    # One bad size (e.g. "M" or None) fails only its own item
+                    results[(brand, product_id, size)] = {"error": f"Invalid size {size!r}"}
+                    continue
+                results[(brand, product_id, size)] = {
+                    "product_id": product_id,
+                    "size": size,
+                    "available": product["in_stock"] and size_value in product["sizes"]
+                }
+            return results
+
+        futures = {
+            item: self.executor.submit(self.check_product_availability, *item)
+            for item in items
+        }
+        done, _ = wait(futures.values(), timeout=BRAND_REQUEST_TIMEOUT if timeout is None else timeout)
+
+        results = {}
+        for item, future in futures.items():
+            if future not in done:
+                future.cancel()
+                results[item] = {"error": f"{item[0]} API timed out"}
+            elif future.exception() is not None:
+                results[item] = {"error": str(future.exception())}
+            else:
+                results[item] = future.result()
+        return results
+
 # Error Handling
 class APIError(Exception):
     """Custom exception for API errors"""
@@ -309,6 +892,12 @@ class APIError(Exception):
         self.status_code = status_code
         super().__init__(self.message)
 
+class CircuitOpenError(APIError):
+    """Raised instead of calling a vendor whose circuit breaker is open"""
+    def __init__(self, vendor: str):
+        self.vendor = vendor
+        super().__init__(f"{vendor} API is unavailable (circuit open)", status_code=503)
+
 # Usage Example:
 if __name__ == "__main__":
     # Initialize API manager
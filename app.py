@@ -1,19 +1,30 @@
 import streamlit as st
 from api_integrations import APIManager
+from catalog import ProductCatalog
+from stores import StoreDirectory, DEFAULT_SEARCH_LOCATION
+from chat_store import ChatStore, ChatHistory
+from health import VendorHealthMonitor, VENDOR_NAMES
+from deadline import Deadline
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
+import sklearn
 import numpy as np
 import re
 import os
 import time
-import folium
-from streamlit_folium import st_folium
-import random
-
-# Initialize API Manager
-api_manager = APIManager()
+from map_page import MUMBAI_CENTER, get_map_stores, show_map
+import hashlib
+import json
+import joblib
+import logging
+import uuid
+from config import (MODEL_ARTIFACT_DIR, CHAT_RENDER_WINDOW, CHAT_STORE_FILE, STORE_DIRECTORY_FILE,
+                    RESPONSE_DEADLINE, LIVE_STOCK_BUDGET, RECOMMENDATION_BUDGET)
+from text_processing import KeywordMatcher, EntityExtractor, TypoCorrector, is_css_content
+
+logger = logging.getLogger(__name__)
 
 # Set page config
 st.set_page_config(
@@ -23,6 +34,54 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Initialize API Manager (one per process, so its worker threads are shared by all sessions and reruns)
+@st.cache_resource(show_spinner=False)
+def get_api_manager():
+    return APIManager()
+
+api_manager = get_api_manager()
+
+# One product catalog per process, kept fresh by a background refresher;
+# sessions only hold a reference to its current snapshot
+@st.cache_resource(show_spinner=False)
+def get_product_catalog():
+    catalog = ProductCatalog(get_api_manager())
+    catalog.start()
+    return catalog
+
+# One store directory per process, persisted to disk between restarts
+@st.cache_resource(show_spinner=False)
+def get_store_directory():
+    return StoreDirectory(get_api_manager(), path=STORE_DIRECTORY_FILE)
+
+# One vendor health monitor per process, probing in the background
+@st.cache_resource(show_spinner=False)
+def get_health_monitor():
+    monitor = VendorHealthMonitor(get_api_manager())
+    monitor.start()
+    return monitor
+
+# One chat log per process; each session keeps only its recent turns in memory
+@st.cache_resource(show_spinner=False)
+def get_chat_store():
+    try:
+        return ChatStore(CHAT_STORE_FILE)
+    except Exception as e:
+        logger.warning("Chat history will not be saved: %s", e)
+        return None
+
+def get_chat_session_id():
+    """Conversation id from the ?session= query parameter, so a reload or restart resumes the chat.
+
+    The id is the only key to the saved transcript: anyone given the page URL
+    can read that conversation.
+    """
+    session_id = st.query_params.get("session")
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        st.query_params["session"] = session_id
+    return session_id
+
 # Initialize theme settings
 if 'theme' not in st.session_state:
     st.session_state.theme = "light"
@@ -451,84 +510,29 @@ def get_custom_css():
 
 # Before any content is displayed, completely reset if needed
 if st.sidebar.button("🔄 RESET EVERYTHING", key="complete_reset"):
-    # Complete reset of all state
+    # Complete reset of all state; the chat starts over as a new conversation and the saved one is kept
+    if "session" in st.query_params:
+        del st.query_params["session"]
     for key in list(st.session_state.keys()):
         if key != 'theme':  # Keep theme preference
             del st.session_state[key]
     st.rerun()
 
-# Force reset of chat history at the beginning to clear any CSS content
-if 'chat_history' in st.session_state:
-    # Look for CSS-related content and do a complete reset if found
-    for message in st.session_state.chat_history:
-        content = message.get('content', '')
-        if isinstance(content, str) and (
-            '@import' in content or 
-            '/* ' in content or 
-            ' {' in content or
-            '.stButton' in content or
-            '@keyframes' in content or
-            content.count(';') > 5
-        ):
-            # Reset the entire chat history
-            st.session_state.chat_history = []
-            st.session_state.last_input = ""
-            break
-
 # Apply custom CSS - ensure this is properly wrapped
 st.markdown(f"<style>{get_custom_css()}</style>", unsafe_allow_html=True)
 
 # Session state initialization
 def init_session_state():
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = ChatHistory(get_chat_store(), get_chat_session_id())
     if 'classifier' not in st.session_state:
         st.session_state.classifier = None
-    if 'last_input' not in st.session_state:
-        st.session_state.last_input = ""
-    if 'product_database' not in st.session_state:
-        # Get products from API
-        products = api_manager.get_all_products()
-        st.session_state.product_database = {}
-        
-        # Process Nike products
-        if 'nike' in products:
-            st.session_state.product_database['nike'] = {}
-            for product in products['nike'].get('products', []):
-                st.session_state.product_database['nike'][product['name']] = {
-                    'price': product['price'],
-                    'sizes': product['sizes'],
-                    'colors': product['colors'],
-                    'in_stock': product['in_stock'],
-                    'image': product.get('image', 'default_image_url'),
-                    'description': product.get('description', f"The {product['name']} delivers comfort and style.")
-                }
-        
-        # Process Adidas products
-        if 'adidas' in products:
-            st.session_state.product_database['adidas'] = {}
-            for product in products['adidas'].get('products', []):
-                st.session_state.product_database['adidas'][product['name']] = {
-                    'price': product['price'],
-                    'sizes': product['sizes'],
-                    'colors': product['colors'],
-                    'in_stock': product['in_stock'],
-                    'image': product.get('image', 'default_image_url'),
-                    'description': product.get('description', f"The {product['name']} offers premium performance.")
-                }
-        
-        # Process Puma products
-        if 'puma' in products:
-            st.session_state.product_database['puma'] = {}
-            for product in products['puma'].get('products', []):
-                st.session_state.product_database['puma'][product['name']] = {
-                    'price': product['price'],
-                    'sizes': product['sizes'],
-                    'colors': product['colors'],
-                    'in_stock': product['in_stock'],
-                    'image': product.get('image', 'default_image_url'),
-                    'description': product.get('description', f"The {product['name']} combines style and comfort.")
-                }
+    # Point the session at the shared catalog snapshot (refreshed in the background when stale)
+    catalog_snapshot = get_product_catalog().get()
+    st.session_state.product_database = catalog_snapshot.products
+    st.session_state.catalog_index = catalog_snapshot.index
+    # Entity gazetteers are rebuilt from the catalog whenever its version changes
+    st.session_state.catalog_version = catalog_snapshot.version
 
     if 'order_database' not in st.session_state:
         # Create a mock order database
@@ -559,36 +563,8 @@ def init_session_state():
             }
         }
     if 'store_locations' not in st.session_state:
-        # Use Google Maps API to get store locations
-        stores = api_manager.google_maps.find_nearby_stores(
-            latitude=40.7128,  # Default to NYC coordinates
-            longitude=-74.0060
-        )
-        
-        if 'results' in stores:
-            st.session_state.store_locations = []
-            for store in stores['results']:
-                store_details = api_manager.google_maps.get_store_details(store['place_id'])
-                if 'result' in store_details:
-                    details = store_details['result']
-                    st.session_state.store_locations.append({
-                        "name": details.get('name', 'Quick Basket Store'),
-                        "address": details.get('formatted_address', 'Address not available'),
-                        "hours": details.get('opening_hours', {}).get('weekday_text', 'Hours not available'),
-                        "phone": details.get('formatted_phone_number', 'Phone not available'),
-                        "features": ["Click & Collect", "Shoe fitting service"]  # Default features
-                    })
-        else:
-            # Use default store locations if API fails
-            st.session_state.store_locations = [
-                {
-                    "name": "Quick Basket City Center",
-                    "address": "123 Main Street, Downtown",
-                    "hours": "9 AM - 9 PM (Mon-Sat), 10 AM - 6 PM (Sun)",
-                    "phone": "555-123-4567",
-                    "features": ["Nike Shop-in-shop", "Shoe fitting service", "Click & Collect"]
-                }
-            ]
+        # Shared store directory; only its first load (or a stale refresh) calls Google Maps
+        st.session_state.store_locations = get_store_directory().get()
     # New session state variables for advanced features
     if 'shopping_cart' not in st.session_state:
         st.session_state.shopping_cart = []
@@ -738,26 +714,35 @@ def load_data():
             st.error(f"Error creating sample data: {str(e)}")
             return None
 
+# Intent model hyperparameters (part of the artifact version key)
+INTENT_MODEL_PARAMS = {
+    'tfidf': {
+        'max_features': 5000,
+        'ngram_range': (1, 3),  # Unigrams, bigrams, and trigrams
+        'analyzer': 'word',
+        'min_df': 2,            # Minimum document frequency
+        'max_df': 0.95,         # Maximum document frequency
+        'sublinear_tf': True,   # Apply sublinear tf scaling
+        'use_idf': True,        # Use inverse document frequency
+        'norm': 'l2'            # L2 normalization
+    },
+    'clf': {
+        'alpha': 0.1,
+        'fit_prior': True
+    }
+}
+
 # Train model
-def train_model(df):
+def train_model(df, artifact_version=None):
     try:
         texts = df['User_Query'].values
         labels = df['Intent'].values
         
         # Create a TF-IDF vectorizer with improved features
-        vectorizer = TfidfVectorizer(
-            max_features=5000, 
-            ngram_range=(1, 3),     # Unigrams, bigrams, and trigrams
-            analyzer='word',
-            min_df=2,               # Minimum document frequency
-            max_df=0.95,            # Maximum document frequency
-            sublinear_tf=True,      # Apply sublinear tf scaling
-            use_idf=True,           # Use inverse document frequency
-            norm='l2'               # L2 normalization
-        )
+        vectorizer = TfidfVectorizer(**INTENT_MODEL_PARAMS['tfidf'])
         
         # Create classifier
-        classifier = MultinomialNB(alpha=0.1, fit_prior=True)
+        classifier = MultinomialNB(**INTENT_MODEL_PARAMS['clf'])
         
         # Create pipeline
         pipeline = Pipeline([
@@ -768,11 +753,102 @@ def train_model(df):
         # Train the model
         pipeline.fit(texts, labels)
         
+        if artifact_version:
+            save_model_artifact(pipeline, artifact_version)
+        
         return pipeline
     except Exception as e:
         st.error(f"Error training model: {str(e)}")
         return None
 
+# Model artifacts
+def get_model_version(path='mock_intents.csv'):
+    """Hash the training CSV, hyperparameters and library versions into an artifact version key"""
+    digest = hashlib.sha256(json.dumps(INTENT_MODEL_PARAMS, sort_keys=True).encode('utf-8'))
+    # Pickles are only safe to load with the versions that wrote them
+    digest.update(f"sklearn={sklearn.__version__};joblib={joblib.__version__}".encode('utf-8'))
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:16]
+
+def get_model_artifact_path(version):
+    return os.path.join(MODEL_ARTIFACT_DIR, f"intent_model-{version}.joblib")
+
+def save_model_artifact(pipeline, version):
+    """Write a fitted pipeline to its versioned artifact file"""
+    try:
+        os.makedirs(MODEL_ARTIFACT_DIR, exist_ok=True)
+        path = get_model_artifact_path(version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # Uncompressed so the numpy arrays can be memory-mapped on load
+        joblib.dump(pipeline, tmp_path)
+        os.replace(tmp_path, path)  # Atomic, so readers never see a partial file
+    except Exception as e:
+        st.warning(f"Could not save model artifact: {str(e)}")
+        return None
+    prune_model_artifacts(version)
+    return path
+
+def prune_model_artifacts(version):
+    """Delete artifacts of every other version; they can never be loaded again"""
+    keep = os.path.basename(get_model_artifact_path(version))
+    for name in os.listdir(MODEL_ARTIFACT_DIR):
+        # Other processes' in-progress .tmp files are left alone
+        if name.startswith("intent_model-") and name.endswith(".joblib") and name != keep:
+            try:
+                os.remove(os.path.join(MODEL_ARTIFACT_DIR, name))
+            except OSError as e:
+                logger.warning("Could not remove stale model artifact %s: %s", name, e)
+
+def load_model_artifact(version):
+    """Load a previously fitted pipeline, memory-mapping its arrays; None if missing"""
+    path = get_model_artifact_path(version)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path, mmap_mode='r')
+    except Exception as e:
+        st.warning(f"Ignoring unreadable model artifact {path}: {str(e)}")
+        return None
+
+# Shared model registry
+def get_training_data_version(path='mock_intents.csv'):
+    """Return a version key that changes whenever the training CSV changes"""
+    try:
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    except OSError:
+        return None
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_shared_classifier(data_version):
+    """Train the intent model once per process and training data version.
+
+    The cache holds a single entry, so a new data version hot-swaps the model
+    and the previous one is released once no session references it.
+    """
+    # Warm start from a persisted artifact; only parse and fit when none matches this data
+    version = get_model_version()
+    classifier = load_model_artifact(version) if version else None
+    if classifier is None:
+        df = load_data()
+        if df is None:
+            return None
+        classifier = train_model(df, artifact_version=get_model_version())
+    return classifier
+
+def get_shared_classifier():
+    """Return the process-wide intent classifier shared read-only by all sessions"""
+    classifier = _load_shared_classifier(get_training_data_version())
+    if classifier is None:
+        # Don't pin a failed training run; retry on the next request
+        _load_shared_classifier.clear()
+    return classifier
+
 # Common typos and corrections for shoe brands and terms
 TYPO_CORRECTIONS = {
     # Brand typos
@@ -797,6 +873,14 @@ TYPO_CORRECTIONS = {
     'payment': ['paymet', 'payement', 'paymnt', 'payemtn']
 }
 
+# Brand and model names that unseen misspellings are fuzzy-matched against
+FUZZY_CORRECTION_TERMS = ['nike', 'adidas', 'puma', 'jordan', 'air max', 'ultraboost', 'stan smith']
+
+@st.cache_resource(show_spinner=False)
+def get_typo_corrector():
+    """Build the typo indexes once per process"""
+    return TypoCorrector(TYPO_CORRECTIONS, fuzzy_terms=FUZZY_CORRECTION_TERMS)
+
 # Inappropriate content keywords
 INAPPROPRIATE_KEYWORDS = [
     'sex', 'porn', 'gambling', 'drugs', 'illegal', 'hack', 'crack', 'steal', 
@@ -811,218 +895,290 @@ OUT_OF_SCOPE_TOPICS = [
     'insurance', 'tax', 'accounting', 'unrelated'
 ]
 
+# Keywords that mark a message as shopping-related
+SHOPPING_KEYWORDS = ['shoe', 'sneaker', 'order', 'delivery', 'store', 'purchase', 
+                     'buy', 'price', 'cost', 'return', 'refund', 'exchange', 
+                     'size', 'color', 'brand', 'nike', 'adidas', 'puma', 'product']
+
+# Keyword families for the rule cascade in get_intent(), checked in this order
+INTENT_RULE_KEYWORDS = {
+    'inappropriate': INAPPROPRIATE_KEYWORDS,
+    'out_of_scope': OUT_OF_SCOPE_TOPICS,
+    'shopping': SHOPPING_KEYWORDS,
+    'policy': ['policy', 'rules', 'terms', 'conditions'],
+    'refund': ['refund', 'return', 'money back', 'cancel', 'exchange'],
+    'availability': ['in stock', 'available', 'have', 'sell', 'carry'],
+    'product': ['nike', 'adidas', 'puma', 'shoes', 'sneakers', 'air max', 'ultraboost'],
+    'order': ['order', 'tracking', 'delivery', 'package', 'shipment'],
+    'store': ['store', 'location', 'address', 'hours', 'open'],
+    'greeting': ['hi', 'hello', 'hey', 'good morning', 'good afternoon'],
+    'size': ['size', 'measurement', 'fit', 'sizing', 'large', 'small', 'medium'],
+    'promo': ['discount', 'sale', 'promotion', 'offer', 'deal', 'coupon', 'code', '% off'],
+    'shipping': ['shipping', 'delivery', 'ship', 'mail', 'postage', 'delivery time', 'how long'],
+    'payment': ['pay', 'payment', 'credit card', 'debit card', 'paypal', 'apple pay', 'google pay'],
+    # Single words used to refine the families above
+    'policy_word': ['policy'],
+    'refund_or_return': ['refund', 'return'],
+    'order_word': ['order']
+}
+
+@st.cache_resource(show_spinner=False)
+def get_intent_rule_matcher():
+    """Compile the rule keyword tables into one automaton, once per process"""
+    return KeywordMatcher(INTENT_RULE_KEYWORDS)
+
 # Check for typos and correct them
 def check_for_typos(text):
-    words = text.lower().split()
-    corrected = []
-    corrections_made = {}
-    
-    for word in words:
-        corrected_word = word
-        for correct_term, typos in TYPO_CORRECTIONS.items():
-            if word in typos:
-                corrected_word = correct_term
-                corrections_made[word] = correct_term
-                break
-        corrected.append(corrected_word)
-    
-    corrected_text = ' '.join(corrected)
+    # Known variants (including multi-word ones) by hash lookup, unseen brand/model misspellings by edit distance
+    corrected_text, corrections_made = get_typo_corrector().correct(text)
     return corrected_text, corrections_made
 
 # Check for inappropriate content
-def check_inappropriate_content(text):
-    text_lower = text.lower()
-    for keyword in INAPPROPRIATE_KEYWORDS:
-        if keyword in text_lower:
-            return True
-    return False
+def check_inappropriate_content(text, matched=None):
+    if matched is None:
+        matched = get_intent_rule_matcher().match(text)
+    return 'inappropriate' in matched
 
 # Check if question is out of scope
-def check_out_of_scope(text):
-    text_lower = text.lower()
-    for topic in OUT_OF_SCOPE_TOPICS:
-        if topic in text_lower:
-            return True
-    
-    # Advanced checks for unrelated questions
-    shopping_keywords = ['shoe', 'sneaker', 'order', 'delivery', 'store', 'purchase', 
-                        'buy', 'price', 'cost', 'return', 'refund', 'exchange', 
-                        'size', 'color', 'brand', 'nike', 'adidas', 'puma', 'product']
+def check_out_of_scope(text, matched=None):
+    if matched is None:
+        matched = get_intent_rule_matcher().match(text)
+    if 'out_of_scope' in matched:
+        return True
     
     # If the message is long and doesn't contain any shopping keywords, it might be out of scope
     if len(text.split()) > 8:  # Reasonably long question
-        if not any(keyword in text_lower for keyword in shopping_keywords):
+        if 'shopping' not in matched:
             return True
     
     return False
 
-# Enhanced entity extraction with typo correction
-def extract_entities(text):
-    # First correct any typos
-    corrected_text, corrections = check_for_typos(text)
-    
-    entities = {
-        'brands': [],
-        'models': [],
-        'sizes': [],
-        'colors': [],
-        'corrections': corrections  # Store any corrections made
-    }
-    
-    # Brand detection
-    brand_patterns = {
+# Entity gazetteers: canonical value -> surface patterns
+ENTITY_GAZETTEERS = {
+    'brands': {
         'nike': ['nike'],
         'adidas': ['adidas'],
         'puma': ['puma'],
         'jordan': ['jordan']
-    }
-    
-    # Model detection
-    model_patterns = {
+    },
+    'models': {
         'air max': ['air max', 'airmax'],
         'ultraboost': ['ultraboost', 'ultra boost'],
         'stan smith': ['stan smith'],
         'dunk': ['dunk'],
-        'react': ['react'],
+        'react': ['nike react'],
         'rs-x': ['rs-x', 'rs x'],
         'suede': ['suede'],
         'gazelle': ['gazelle']
+    },
+    # Model names that are also everyday words: only counted when a brand is mentioned too
+    'model_names': {
+        'react': ['react']
+    },
+    'colors': {
+        color: [color] for color in ['black', 'white', 'red', 'blue', 'green', 'yellow', 'gray', 'grey']
     }
+}
+
+# Size detection (US sizes 4-15)
+SIZE_PATTERN = re.compile(r'\b(size\s+)?([4-9]|1[0-5])(\.5)?\b')
+
+def get_catalog_gazetteers(product_database):
+    """Derive model and color gazetteers from the live product database.
+
+    A product is recognised by its full name ("nike react"); the name without
+    the brand ("react") goes into the brand-gated `model_names`.
+    """
+    gazetteers = {'brands': {}, 'models': {}, 'model_names': {}, 'colors': {}}
+    for brand, models in product_database.items():
+        gazetteers['brands'][brand.lower()] = [brand.lower()]
+        for model_name, details in models.items():
+            model = model_name.lower()
+            if model.startswith(brand.lower() + " "):
+                model = model[len(brand) + 1:]
+            gazetteers['models'][model] = [f"{brand.lower()} {model}"]
+            gazetteers['model_names'][model] = [model]
+            for color in details.get('colors', []):
+                gazetteers['colors'][color.lower()] = [color.lower()]
+    return gazetteers
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _build_entity_extractor(catalog_version, _product_database):
+    extractor = EntityExtractor(ENTITY_GAZETTEERS)
+    if _product_database:
+        extractor = extractor.extend(get_catalog_gazetteers(_product_database))
+    return extractor
+
+def get_entity_extractor():
+    """Return the compiled entity extractor for the current catalog, built once per catalog version"""
+    return _build_entity_extractor(
+        st.session_state.get('catalog_version'),
+        st.session_state.get('product_database')
+    )
+
+# Enhanced entity extraction with typo correction
+def extract_entities(text, deadline=None):
+    # First correct any typos (skipped once the reply's time budget has run out)
+    if deadline is not None and deadline.expired():
+        deadline.skip("typo correction")
+        corrected_text, corrections = text.lower(), {}
+    else:
+        corrected_text, corrections = check_for_typos(text)
     
-    # Size detection (US sizes 4-15)
-    size_pattern = r'\b(size\s+)?([4-9]|1[0-5])(\.5)?\b'
-    size_matches = re.findall(size_pattern, corrected_text.lower())
-    if size_matches:
-        for match in size_matches:
-            if match[1]:  # Size number
-                size = match[1]
-                if match[2]:  # Half size
-                    size += match[2]
-                entities['sizes'].append(size)
+    # Brands, models and colors in one pass over the message
+    found = get_entity_extractor().extract(corrected_text)
     
-    # Color detection
-    color_list = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'gray', 'grey']
-    
-    # Check for colors
-    for color in color_list:
-        if re.search(r'\b' + color + r'\b', corrected_text.lower()):
-            entities['colors'].append(color)
-    
-    # Check for brands
-    for brand, patterns in brand_patterns.items():
-        for pattern in patterns:
-            if re.search(r'\b' + pattern + r'\b', corrected_text.lower()):
-                entities['brands'].append(brand)
-                break
-    
-    # Check for models
-    for model, patterns in model_patterns.items():
-        for pattern in patterns:
-            if re.search(r'\b' + pattern + r'\b', corrected_text.lower()):
-                entities['models'].append(model)
-                break
-    
-    # Remove duplicates
-    for key in entities:
-        if key != 'corrections':
-            entities[key] = list(set(entities[key]))
+    models = found.get('models', [])
+    if found.get('brands'):
+        # Everyday-word model names count only next to a brand ("nike react", not "please react")
+        models = models + [model for model in found.get('model_names', []) if model not in models]
+    
+    entities = {
+        'brands': found.get('brands', []),
+        'models': models,
+        'sizes': [],
+        'colors': found.get('colors', []),
+        'corrections': corrections  # Store any corrections made
+    }
+    
+    # Size detection
+    for match in SIZE_PATTERN.findall(corrected_text.lower()):
+        if match[1]:  # Size number
+            size = match[1]
+            if match[2]:  # Half size
+                size += match[2]
+            if size not in entities['sizes']:
+                entities['sizes'].append(size)
     
     return entities
 
-# Predict intent from user input
-def get_intent(text, classifier):
-    try:
-        # Check for inappropriate content
-        if check_inappropriate_content(text):
-            return "Inappropriate", 0.95, {"original_text": text}
+# Rule-based intent detection
+def apply_intent_rules(text, deadline=None):
+    """Run the keyword rule cascade on one message.
+
+    Returns (intent, confidence, entities, corrected_text); intent is None when no
+    rule fires and the message should go to the classifier.
+    """
+    # Find every rule keyword family in a single pass over the message
+    matcher = get_intent_rule_matcher()
+    matched = matcher.match(text)
+    
+    # Check for inappropriate content
+    if check_inappropriate_content(text, matched):
+        return "Inappropriate", 0.95, {"original_text": text}, text
+    
+    # Check for out-of-scope questions
+    if check_out_of_scope(text, matched):
+        return "Out_Of_Scope", 0.9, {"original_text": text}, text
+    
+    # Extract entities with typo correction
+    entities = extract_entities(text, deadline)
+    
+    # If corrections were made, use the corrected text for intent classification
+    corrected_text = text
+    if entities['corrections']:
+        # Replace each typo with its correction in the original text
+        corrected_text = text
+        for typo, correction in entities['corrections'].items():
+            corrected_text = re.sub(r'\b' + re.escape(typo) + r'\b', correction, corrected_text, flags=re.IGNORECASE)
+    else:
+        corrected_text = text
+    
+    # Typo corrections change the text, so the rule families need a fresh pass
+    if corrected_text != text:
+        matched = matcher.match(corrected_text)
+    
+    # Check for policy-related keywords
+    if 'policy' in matched:
+        if 'refund_or_return' in matched:
+            return "Return Policy", 0.9, entities, corrected_text
+        return "Unknown/Other", 0.8, entities, corrected_text
         
-        # Check for out-of-scope questions
-        if check_out_of_scope(text):
-            return "Out_Of_Scope", 0.9, {"original_text": text}
+    # Check for refund-related keywords
+    if 'refund' in matched:
+        if 'policy_word' in matched:
+            return "Return Policy", 0.9, entities, corrected_text
+        return "Return & Refund Policy", 0.9, entities, corrected_text
         
-        # Extract entities with typo correction
-        entities = extract_entities(text)
+    # Better product availability detection
+    if 'availability' in matched or entities['brands'] or entities['models']:
+        if 'product' in matched or entities['brands'] or entities['models']:
+            return "Product Availability", 0.9, entities, corrected_text
         
-        # If corrections were made, use the corrected text for intent classification
-        corrected_text = text
-        if entities['corrections']:
-            # Replace each typo with its correction in the original text
-            corrected_text = text
-            for typo, correction in entities['corrections'].items():
-                corrected_text = re.sub(r'\b' + re.escape(typo) + r'\b', correction, corrected_text, flags=re.IGNORECASE)
-        else:
-            corrected_text = text
+    # Check for order-related keywords
+    if 'order' in matched:
+        return "Order Tracking", 0.9, entities, corrected_text
+    
+    # Check for store-related keywords
+    if 'store' in matched:
+        return "Store Location/Hours", 0.9, entities, corrected_text
         
-        # Check for policy-related keywords
-        policy_keywords = ['policy', 'rules', 'terms', 'conditions']
-        if any(keyword in corrected_text.lower() for keyword in policy_keywords):
-            if 'refund' in corrected_text.lower() or 'return' in corrected_text.lower():
-                return "Return Policy", 0.9, entities
-            return "Unknown/Other", 0.8, entities
-            
-        # Check for refund-related keywords
-        refund_keywords = ['refund', 'return', 'money back', 'cancel', 'exchange']
-        if any(keyword in corrected_text.lower() for keyword in refund_keywords):
-            if 'policy' in corrected_text.lower():
-                return "Return Policy", 0.9, entities
-            return "Return & Refund Policy", 0.9, entities
-            
-        # Check for product availability
-        availability_keywords = ['in stock', 'available', 'have', 'sell', 'carry']
-        product_keywords = ['nike', 'adidas', 'puma', 'shoes', 'sneakers', 'air max', 'ultraboost']
+    # Check for greeting keywords (only at the start of the message)
+    if matched.get('greeting') == 0:
+        return "General Greetings", 0.9, entities, corrected_text
         
-        # Better product availability detection
-        if any(keyword in corrected_text.lower() for keyword in availability_keywords) or entities['brands'] or entities['models']:
-            if any(product in corrected_text.lower() for product in product_keywords) or entities['brands'] or entities['models']:
-                return "Product Availability", 0.9, entities
-            
-        # Check for order-related keywords
-        order_keywords = ['order', 'tracking', 'delivery', 'package', 'shipment']
-        if any(keyword in corrected_text.lower() for keyword in order_keywords):
-            return "Order Tracking", 0.9, entities
+    # Check for size-related keywords
+    if 'size' in matched:
+        return "Size Inquiry", 0.9, entities, corrected_text
         
-        # Check for store-related keywords
-        store_keywords = ['store', 'location', 'address', 'hours', 'open']
-        if any(keyword in corrected_text.lower() for keyword in store_keywords):
-            return "Store Location/Hours", 0.9, entities
-            
-        # Check for greeting keywords
-        greeting_keywords = ['hi', 'hello', 'hey', 'good morning', 'good afternoon']
-        if any(corrected_text.lower().startswith(keyword) for keyword in greeting_keywords):
-            return "General Greetings", 0.9, entities
-            
-        # Check for size-related keywords
-        size_keywords = ['size', 'measurement', 'fit', 'sizing', 'large', 'small', 'medium']
-        if any(keyword in corrected_text.lower() for keyword in size_keywords):
-            return "Size Inquiry", 0.9, entities
-            
-        # Check for promotion-related keywords
-        promo_keywords = ['discount', 'sale', 'promotion', 'offer', 'deal', 'coupon', 'code', '% off']
-        if any(keyword in corrected_text.lower() for keyword in promo_keywords):
-            return "Promotions & Discounts", 0.9, entities
-            
-        # Check for shipping-related keywords
-        shipping_keywords = ['shipping', 'delivery', 'ship', 'mail', 'postage', 'delivery time', 'how long']
-        if any(keyword in corrected_text.lower() for keyword in shipping_keywords) and 'order' not in corrected_text.lower():
-            return "Shipping Information", 0.9, entities
-            
-        # Check for payment-related keywords
-        payment_keywords = ['pay', 'payment', 'credit card', 'debit card', 'paypal', 'apple pay', 'google pay']
-        if any(keyword in corrected_text.lower() for keyword in payment_keywords):
-            return "Payment Options", 0.9, entities
+    # Check for promotion-related keywords
+    if 'promo' in matched:
+        return "Promotions & Discounts", 0.9, entities, corrected_text
         
-        # Use classifier for other cases
-        intent = classifier.predict([corrected_text])[0]
-        probs = classifier.predict_proba([corrected_text])[0]
-        confidence = probs[classifier.classes_ == intent][0]
+    # Check for shipping-related keywords
+    if 'shipping' in matched and 'order_word' not in matched:
+        return "Shipping Information", 0.9, entities, corrected_text
         
-        if confidence < 0.4:
-            # Low confidence might indicate misunderstood query
-            if len(text.split()) < 3:  # Very short query
-                return "Misunderstood", 0.7, entities
-            return "Unknown/Other", confidence, entities
-            
-        return intent, confidence, entities
+    # Check for payment-related keywords
+    if 'payment' in matched:
+        return "Payment Options", 0.9, entities, corrected_text
+    
+    return None, None, entities, corrected_text
+
+# Classifier fallback for messages no rule matched
+def _classifier_intent(text, intent, confidence, entities):
+    if confidence < 0.4:
+        # Low confidence might indicate misunderstood query
+        if len(text.split()) < 3:  # Very short query
+            return "Misunderstood", 0.7, entities
+        return "Unknown/Other", confidence, entities
+        
+    return intent, confidence, entities
+
+# Classify many messages at once (offline replays, bulk analytics)
+def classify_batch(texts, classifier, deadline=None):
+    """Return [(intent, confidence, entities), ...] for a list of messages.
+
+    Rules run per distinct message; every message that falls through to the model
+    is scored in a single predict_proba call. If `deadline` has expired by then,
+    the model is skipped and those messages are treated as unrecognised.
+    """
+    outcomes = {}
+    pending = []
+    for text in dict.fromkeys(texts):  # Identical messages are classified once
+        intent, confidence, entities, corrected_text = apply_intent_rules(text, deadline)
+        if intent is not None:
+            outcomes[text] = (intent, confidence, entities)
+        else:
+            pending.append((text, corrected_text, entities))
+    
+    if pending and deadline is not None and deadline.expired():
+        deadline.skip("intent model")
+        for text, _, entities in pending:
+            outcomes[text] = _classifier_intent(text, "Unknown/Other", 0.0, entities)
+    elif pending:
+        # predict() would transform the inputs a second time; take the argmax of the probabilities instead
+        probs = classifier.predict_proba([corrected_text for _, corrected_text, _ in pending])
+        best = probs.argmax(axis=1)
+        for (text, _, entities), row, index in zip(pending, probs, best):
+            outcomes[text] = _classifier_intent(text, classifier.classes_[index], row[index], entities)
+    
+    return [outcomes[text] for text in texts]
+
+# Predict intent from user input
+def get_intent(text, classifier, deadline=None):
+    try:
+        return classify_batch([text], classifier, deadline)[0]
     except Exception as e:
         st.error(f"Error predicting intent: {str(e)}")
         return "Misunderstood", 0.5, {}
@@ -1202,7 +1358,16 @@ def extract_order_id(message):
     return None
 
 # Generate response based on intent
-def generate_response(user_input, classifier):
+def generate_response(user_input, classifier, deadline=None):
+    """Reply to one chat message within `deadline` (RESPONSE_DEADLINE seconds by default).
+
+    Optional stages degrade as the budget runs low: typo correction and the
+    intent model are skipped once it has expired, stock comes from the catalog
+    snapshot instead of the vendor, and recommendations are left out.
+    """
+    if deadline is None:
+        deadline = Deadline(RESPONSE_DEADLINE)
+    
     # Check for shopping cart commands first
     cart_command, cart_params = extract_cart_command(user_input)
     
@@ -1240,7 +1405,7 @@ def generate_response(user_input, classifier):
     
     # If not a shopping cart command, proceed with intent classification    
     # Get intent and entities
-    intent, confidence, entities = get_intent(user_input, classifier)
+    intent, confidence, entities = get_intent(user_input, classifier, deadline)
     
     # Update user preferences and conversation context
     if 'brands' in entities and entities['brands']:
@@ -1310,12 +1475,9 @@ def generate_response(user_input, classifier):
                 
                 # Check our database
                 product_info = None
-                if brand.lower() in st.session_state.product_database:
-                    for prod_model in st.session_state.product_database[brand.lower()]:
-                        if model.lower() in prod_model.lower():
-                            product_info = st.session_state.product_database[brand.lower()][prod_model]
-                            model = prod_model
-                            break
+                match = st.session_state.catalog_index.find_model(brand, model)
+                if match:
+                    model, product_info = match
                 
                 if product_info:
                     if product_info["in_stock"]:
@@ -1323,7 +1485,7 @@ def generate_response(user_input, classifier):
                         
                         if sizes:
                             size = sizes[0]
-                            if float(size) in product_info["sizes"]:
+                            if is_size_available(brand, product_info, size, deadline):
                                 response += f"Size {size} is available. "
                             else:
                                 response += f"Size {size} is not in stock, but we have sizes {', '.join(map(str, product_info['sizes']))}. "
@@ -1343,14 +1505,14 @@ def generate_response(user_input, classifier):
                         response += f"\n\nWould you like to add {brand.capitalize()} {model} to your cart?"
                         
                         # Add product recommendations
-                        recommendations = get_similar_products(brand, model)
+                        recommendations = get_similar_products(brand, model) if has_budget(deadline, RECOMMENDATION_BUDGET, "recommendations") else []
                         if recommendations:
                             response += format_recommendation_response(recommendations)
                     else:
                         response = f"I'm sorry, {brand.capitalize()} {model} shoes are currently out of stock."
                         
                         # Suggest alternatives based on preferences
-                        recommendations = get_personalized_recommendations()
+                        recommendations = get_personalized_recommendations() if has_budget(deadline, RECOMMENDATION_BUDGET, "recommendations") else []
                         if recommendations:
                             response += "\n\nHere are some alternatives you might like:"
                             response += format_recommendation_response(recommendations)
@@ -1372,13 +1534,16 @@ def generate_response(user_input, classifier):
     
     # Handle store location/hours
     elif intent == "Store Location/Hours":
-        store_info = st.session_state.store_locations[0]  # Default to first store
+        # Answer with the store nearest the user (or the search area when we don't know where they are)
+        user_lat, user_lng = get_user_location() or DEFAULT_SEARCH_LOCATION
+        nearest = get_store_directory().index.nearest(user_lat, user_lng, k=1)
+        store_info = nearest[0][0] if nearest else st.session_state.store_locations[0]
         response = f"Our {store_info['name']} is located at {store_info['address']}. Hours: {store_info['hours']}. Phone: {store_info['phone']}."
     
     # Add personalized recommendations for general inquiries
     elif intent == "General Greetings" or intent == "Unknown/Other":
         if st.session_state.user_preferences['favorite_brands'] or st.session_state.user_preferences['viewed_products']:
-            recommendations = get_personalized_recommendations()
+            recommendations = get_personalized_recommendations() if has_budget(deadline, RECOMMENDATION_BUDGET, "recommendations") else []
             if recommendations:
                 response += "\n\nBased on your interests, you might like these products:"
                 response += format_recommendation_response(recommendations)
@@ -1391,6 +1556,39 @@ def generate_response(user_input, classifier):
     
     return response
 
+# User location
+def get_user_location():
+    """(lat, lng) entered under "Your Location" in the sidebar, or None until both are set"""
+    lat, lng = st.session_state.get('user_lat'), st.session_state.get('user_lng')
+    if lat is None or lng is None:
+        return None
+    return lat, lng
+
+# Response budget helpers
+def has_budget(deadline, seconds, stage):
+    """True if `deadline` has `seconds` left for `stage`; otherwise records the stage as skipped"""
+    if deadline.has(seconds):
+        return True
+    deadline.skip(stage)
+    return False
+
+def is_size_available(brand, product_info, size, deadline):
+    """Live vendor stock for one size while the budget allows, else the catalog snapshot's"""
+    cached = float(size) in product_info["sizes"]
+    if not product_info.get("id") or not has_budget(deadline, LIVE_STOCK_BUDGET, "live stock"):
+        return cached
+    key = (brand.lower(), product_info["id"], str(size))
+    try:
+        result = api_manager.check_bulk_availability([key], timeout=deadline.remaining())[key]
+    except Exception as e:
+        logger.warning("Live stock check failed: %s", e)
+        deadline.skip("live stock")
+        return cached
+    if "available" not in result:
+        deadline.skip("live stock")
+        return cached
+    return result["available"]
+
 # Product recommendation functions
 def update_user_preferences(entities, intent):
     """Update user preferences based on their queries and conversation"""
@@ -1441,20 +1639,21 @@ def update_conversation_context(entities, intent, user_input):
 def get_similar_products(brand, model, limit=2):
     """Get similar products to recommend"""
     similar_products = []
+    catalog_index = st.session_state.catalog_index
     
     # If we know the brand and model
     if brand and brand.lower() in st.session_state.product_database:
         target_price = None
+        matching_models = catalog_index.matching_models(brand, model)
         
         # Find the price of the current product
-        for prod_model, details in st.session_state.product_database[brand.lower()].items():
-            if model.lower() in prod_model.lower():
-                target_price = details["price"]
-                break
+        if matching_models:
+            target_price = matching_models[0][1]["price"]
         
         # Find similar products from the same brand
-        for prod_model, details in st.session_state.product_database[brand.lower()].items():
-            if model.lower() not in prod_model.lower() and details["in_stock"]:
+        matching_names = {prod_model for prod_model, _ in matching_models}
+        for _, prod_model, details in catalog_index.query(brand=brand.lower(), in_stock=True):
+            if prod_model not in matching_names:
                 similar_products.append({
                     "brand": brand,
                     "model": prod_model,
@@ -1464,44 +1663,41 @@ def get_similar_products(brand, model, limit=2):
         
         # If we have a price, also find products with similar price points
         if target_price:
-            for other_brand, models in st.session_state.product_database.items():
-                if other_brand != brand.lower():
-                    for other_model, details in models.items():
-                        if details["in_stock"] and abs(details["price"] - target_price) <= 30:
-                            similar_products.append({
-                                "brand": other_brand.capitalize(),
-                                "model": other_model,
-                                "price": details["price"],
-                                "similarity": "similar price"
-                            })
+            for other_brand, other_model, details in catalog_index.query(
+                min_price=target_price - 30, max_price=target_price + 30,
+                in_stock=True, exclude_brand=brand.lower()
+            ):
+                similar_products.append({
+                    "brand": other_brand.capitalize(),
+                    "model": other_model,
+                    "price": details["price"],
+                    "similarity": "similar price"
+                })
     
     # If we only know the brand
     elif brand and brand.lower() in st.session_state.product_database:
         # Recommend products from this brand
-        for prod_model, details in st.session_state.product_database[brand.lower()].items():
-            if details["in_stock"]:
-                similar_products.append({
-                    "brand": brand,
-                    "model": prod_model,
-                    "price": details["price"],
-                    "similarity": "popular model"
-                })
+        for _, prod_model, details in catalog_index.query(brand=brand.lower(), in_stock=True):
+            similar_products.append({
+                "brand": brand,
+                "model": prod_model,
+                "price": details["price"],
+                "similarity": "popular model"
+            })
     
     # If we don't have enough recommendations yet, add some based on preferences
     if len(similar_products) < limit and st.session_state.user_preferences['favorite_brands']:
         # Add products from favorite brands
         for fav_brand in st.session_state.user_preferences['favorite_brands']:
-            if fav_brand.lower() in st.session_state.product_database:
-                for prod_model, details in st.session_state.product_database[fav_brand.lower()].items():
-                    if details["in_stock"]:
-                        product = {
-                            "brand": fav_brand.capitalize(),
-                            "model": prod_model,
-                            "price": details["price"],
-                            "similarity": "from favorite brand"
-                        }
-                        if product not in similar_products:
-                            similar_products.append(product)
+            for _, prod_model, details in catalog_index.query(brand=fav_brand.lower(), in_stock=True):
+                product = {
+                    "brand": fav_brand.capitalize(),
+                    "model": prod_model,
+                    "price": details["price"],
+                    "similarity": "from favorite brand"
+                }
+                if product not in similar_products:
+                    similar_products.append(product)
     
     # Sort by price and limit results
     similar_products = sorted(similar_products, key=lambda x: x["price"])
@@ -1599,19 +1795,10 @@ def add_to_cart(brand, model, size=None, color=None, quantity=1):
         return False, "Brand not found"
     
     # Find the exact model
-    model_found = False
-    product_details = None
-    actual_model_name = None
-    
-    for prod_model, details in st.session_state.product_database[brand.lower()].items():
-        if model.lower() in prod_model.lower():
-            model_found = True
-            product_details = details
-            actual_model_name = prod_model
-            break
-    
-    if not model_found:
+    match = st.session_state.catalog_index.find_model(brand, model)
+    if not match:
         return False, "Model not found"
+    actual_model_name, product_details = match
     
     # Check if in stock
     if not product_details["in_stock"]:
@@ -1866,79 +2053,11 @@ def show_size_guide():
             if system != current_size_system:
                 st.markdown(f"{system}: **{SIZE_GUIDE[system][closest_index]}**")
 
-def is_css_content(text):
-    """Check if the text appears to be CSS content - extremely thorough version"""
-    if not text or not isinstance(text, str):
-        return False
-        
-    # Common CSS patterns that strongly indicate CSS content
-    strong_indicators = [
-        "@import url(",
-        "@keyframes",
-        "@media",
-        "font-family:",
-        "margin:",
-        "padding:",
-        "display: flex",
-        "position: absolute",
-        "background-color:",
-        "linear-gradient("
-    ]
-    
-    # If text contains any strong indicators, it's likely CSS
-    for indicator in strong_indicators:
-        if indicator in text:
-            return True
-    
-    # CSS structure patterns
-    css_structural_patterns = [
-        r'\s*\.\w+\s*{',             # .classname {
-        r'\s*#\w+\s*{',              # #id {
-        r'\s*\w+\s*{\s*\w+:',        # element { property:
-        r'}\s*\.\w+\s*{',            # } .classname {
-        r'}\s*#\w+\s*{',             # } #id {
-        r'\s*@\w+\s*{',              # @media/keyframes {
-        r':[^;{]+;',                 # :pseudo-class
-        r'}\s*$'                     # ending with }
-    ]
-    
-    # Check for CSS structure patterns
-    for pattern in css_structural_patterns:
-        if re.search(pattern, text):
-            return True
-    
-    # Check for typical CSS property-value pairs
-    css_property_pattern = r'(\s*[\w-]+\s*:\s*[^;{]+\s*;)'
-    property_count = len(re.findall(css_property_pattern, text))
-    
-    # If we have multiple property-value pairs, it's likely CSS
-    if property_count > 3:
-        return True
-        
-    # Count brace pairs and semicolons - high counts indicate CSS
-    opening_braces = text.count('{')
-    closing_braces = text.count('}')
-    semicolons = text.count(';')
-    
-    # If balanced braces and many semicolons, it's likely CSS
-    if opening_braces > 1 and opening_braces == closing_braces and semicolons > 5:
-        return True
-        
-    # If long text with CSS-like patterns or many semicolons, likely CSS
-    if len(text) > 200 and (semicolons > 10 or ('{' in text and '}' in text)):
-        return True
-    
-    return False
-
 # Clean chat history of any CSS content
 def clean_chat_history():
     """Remove any messages that appear to be CSS code"""
     if 'chat_history' in st.session_state:
-        cleaned_history = []
-        for message in st.session_state.chat_history:
-            if not is_css_content(message['content']):
-                cleaned_history.append(message)
-        st.session_state.chat_history = cleaned_history
+        st.session_state.chat_history.retain(lambda message: not is_css_content(message['content']))
 
 # Call this when the app initializes
 if 'css_cleaned' not in st.session_state:
@@ -1965,6 +2084,91 @@ def handle_css_message(css_text):
     st.session_state.chat_history.append({'role': 'assistant', 'content': response})
     return response
 
+def check_cart_availability():
+    """Return the cart items a vendor reports as unavailable, checked in one batch"""
+    cart_items = {}
+    for item in st.session_state.shopping_cart:
+        match = st.session_state.catalog_index.find_model(item["brand"], item["model"])
+        if match and match[1].get("id"):
+            cart_items.setdefault((item["brand"].lower(), match[1]["id"], str(item["size"])), []).append(item)
+
+    try:
+        results = api_manager.check_bulk_availability(cart_items)
+    except Exception as e:
+        st.warning(f"Could not verify stock before checkout: {str(e)}")
+        return []
+
+    # Only block on an explicit "not available"; vendor errors don't stop checkout
+    return [
+        item
+        for key, items in cart_items.items()
+        if results.get(key, {}).get("available") is False
+        for item in items
+    ]
+
+# Chat transcript rendering
+def render_chat_message(message):
+    """HTML block for one chat turn"""
+    if message['role'] == 'user':
+        return f"<div class='chat-message user'><div class='content'><strong>You:</strong> {message['content']}</div></div>"
+    return f"<div class='chat-message assistant'><div class='content'><strong>Assistant:</strong> {message['content']}</div></div>"
+
+def get_rendered_chat():
+    """Pre-rendered HTML for every turn in chat_history; only turns added since the last call are rendered"""
+    cache = st.session_state.setdefault('chat_render_cache', {'messages': [], 'html': []})
+    history = st.session_state.chat_history
+    cached = cache['messages']
+
+    # Drop turns that have rolled out of the front of the history buffer
+    if cached and len(history) and cached[0] is not history[0]:
+        rolled = next((i for i, message in enumerate(cached) if message is history[0]), len(cached))
+        del cached[:rolled], cache['html'][:rolled]
+
+    # Keep the longest prefix that is still the same message objects (history can be cleared or filtered)
+    if len(cached) <= len(history) and (not cached or cached[-1] is history[len(cached) - 1]):
+        common = len(cached)
+    else:
+        common = 0
+        while common < min(len(cached), len(history)) and cached[common] is history[common]:
+            common += 1
+
+    del cached[common:], cache['html'][common:]
+    for message in history[common:]:
+        cached.append(message)
+        cache['html'].append(render_chat_message(message))
+    return cache['html']
+
+def handle_chat_input():
+    """on_change callback for the chat box: adds the user's turn and the reply before the script reruns"""
+    user_input = st.session_state.user_input
+    if not user_input:
+        return
+    st.session_state.user_input = ""  # Each change of the box is one message, so repeats go through
+
+    # Check if input appears to be CSS code
+    if is_css_content(user_input):
+        handle_css_message(user_input)
+        return
+
+    # Add user message to chat history
+    st.session_state.chat_history.append({'role': 'user', 'content': user_input})
+
+    # Generate response
+    if st.session_state.classifier is not None:
+        deadline = Deadline(RESPONSE_DEADLINE)
+        response = generate_response(user_input, st.session_state.classifier, deadline)
+        if deadline.skipped:
+            logger.info("Reply took %.2fs; skipped %s to stay within %ss",
+                        deadline.elapsed(), ", ".join(deadline.skipped), deadline.seconds)
+
+        # Check if response contains CSS content
+        if is_css_content(response):
+            # Replace with a safe message
+            response = "I generated a response with styling information, but I'll omit it to avoid display issues. Please try asking in a different way."
+
+        # Add assistant message to chat history
+        st.session_state.chat_history.append({'role': 'assistant', 'content': response})
+
 # Process payment using Google Pay
 def process_payment(total_amount: float) -> bool:
     try:
@@ -1982,37 +2186,6 @@ def process_payment(total_amount: float) -> bool:
         st.error(f"Payment processing error: {str(e)}")
         return False
 
-def generate_random_stores(center_lat, center_lng, num_stores=5, radius_km=10):
-    """Generate random store locations within a radius of the center point"""
-    if 'store_locations' not in st.session_state:
-        stores = []
-        for i in range(num_stores):
-            # Convert radius from km to degrees (approximate)
-            radius_lat = radius_km / 111  # 1 degree latitude = 111 km
-            radius_lng = radius_km / (111 * abs(center_lat / 90))  # Adjust for latitude
-            
-            # Generate random offset
-            lat = center_lat + random.uniform(-radius_lat, radius_lat)
-            lng = center_lng + random.uniform(-radius_lng, radius_lng)
-            
-            store_name = f"Quick Basket Store #{i+1}"
-            store_type = random.choice(["Flagship Store", "Express Store", "Outlet Store"])
-            stores.append({
-                "name": store_name,
-                "type": store_type,
-                "location": [lat, lng],
-                "features": random.sample([
-                    "Nike Collection", 
-                    "Adidas Collection", 
-                    "Puma Collection",
-                    "Click & Collect",
-                    "Shoe Fitting",
-                    "Express Delivery"
-                ], k=3)
-            })
-        st.session_state.store_locations = stores
-    return st.session_state.store_locations
-
 def show_store_map():
     """Display the store locations map"""
     st.header("🏪 Quick Basket Store Locations")
@@ -2025,65 +2198,14 @@ def show_store_map():
     - 🟢 Green circle: Delivery zone (10km radius)
     """)
     
-    # Mumbai coordinates
-    mumbai_center = [19.0760, 72.8777]
-    
     # Create two columns for map and store list
     map_col, info_col = st.columns([2, 1])
     
+    # Same seeded stores every rerun, and the map HTML is only rendered once per store set
+    stores = get_map_stores(MUMBAI_CENTER[0], MUMBAI_CENTER[1], num_stores=8, radius_km=10)
+    
     with map_col:
-        # Get store locations (using session state to prevent regeneration)
-        stores = generate_random_stores(
-            center_lat=mumbai_center[0],
-            center_lng=mumbai_center[1],
-            num_stores=8,
-            radius_km=10
-        )
-        
-        # Create the base map
-        m = folium.Map(location=mumbai_center, zoom_start=12)
-        
-        # Add HQ marker
-        folium.Marker(
-            mumbai_center,
-            popup="Quick Basket HQ - Mumbai",
-            icon=folium.Icon(color='red', icon='info-sign')
-        ).add_to(m)
-        
-        # Add store markers with custom icons and popups
-        for store in stores:
-            popup_html = f"""
-            <div style='width: 200px'>
-                <h4>{store['name']}</h4>
-                <p><strong>Type:</strong> {store['type']}</p>
-                <p><strong>Features:</strong></p>
-                <ul>
-                    {''.join(f'<li>{feature}</li>' for feature in store['features'])}
-                </ul>
-            </div>
-            """
-            
-            folium.Marker(
-                store['location'],
-                popup=folium.Popup(popup_html, max_width=300),
-                icon=folium.Icon(
-                    color='blue',
-                    icon='shopping-cart',
-                    prefix='fa'
-                )
-            ).add_to(m)
-        
-        # Add delivery radius
-        folium.Circle(
-            mumbai_center,
-            radius=10000,  # 10km in meters
-            color='green',
-            fill=True,
-            popup='Delivery Zone'
-        ).add_to(m)
-        
-        # Display the map
-        st_folium(m, width=None, height=500, key="store_map")
+        show_map(MUMBAI_CENTER, stores)
     
     with info_col:
         # Display store list
@@ -2203,9 +2325,15 @@ def main():
             
             # Checkout and Clear buttons
             if st.button("🛒 Checkout"):
-                st.session_state.shopping_cart = []
-                st.success("Order placed successfully! Your cart has been cleared.")
-                st.rerun()
+                unavailable = check_cart_availability()
+                if unavailable:
+                    st.error("Some items are no longer available: " + ", ".join(
+                        f"{item['brand']} {item['model']} (size {item['size']})" for item in unavailable
+                    ))
+                else:
+                    st.session_state.shopping_cart = []
+                    st.success("Order placed successfully! Your cart has been cleared.")
+                    st.rerun()
             
             if st.button("🗑️ Clear Cart"):
                 st.session_state.shopping_cart = []
@@ -2223,8 +2351,15 @@ def main():
         
         st.markdown("---")
         
+        # Lets store questions be answered with the store nearest the user
+        with st.expander("📍 Your Location"):
+            st.number_input("Latitude", min_value=-90.0, max_value=90.0, value=None, format="%.4f", key="user_lat")
+            st.number_input("Longitude", min_value=-180.0, max_value=180.0, value=None, format="%.4f", key="user_lng")
+            if get_user_location() is None:
+                st.caption("Without a location, store answers use the store nearest our main search area.")
+        
         if st.button("🗑️ Clear Chat History", key="clear_chat"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.rerun()
     
     # Main content
@@ -2260,74 +2395,36 @@ def main():
         chat_tab, catalog_tab, size_guide_tab, orders_tab = st.tabs(["💬 Chat", "👟 Product Catalog", "📏 Size Guide", "📦 Your Orders"])
         
         with chat_tab:
-            # Model initialization
+            # Model initialization (shared across sessions, retrained only when the training data changes)
             if st.session_state.classifier is None:
                 with st.spinner("🔄 Setting up the assistant..."):
-                    df = load_data()
-                    if df is not None:
-                        classifier = train_model(df)
-                        if classifier is not None:
-                            st.session_state.classifier = classifier
-                            st.success("✅ Ready to assist you!")
-                        else:
-                            st.error("❌ Failed to train the assistant.")
+                    classifier = get_shared_classifier()
+                    if classifier is not None:
+                        st.session_state.classifier = classifier
+                        st.success("✅ Ready to assist you!")
                     else:
-                        st.error("❌ Failed to load training data.")
+                        st.error("❌ Failed to set up the assistant.")
+            else:
+                # Pick up a hot-swapped model if the training data has changed
+                st.session_state.classifier = get_shared_classifier() or st.session_state.classifier
             
             # Chat interface
             st.markdown("### 💬 Chat with our Quick AI assistant")
             
-            # Display chat history
-            for message in st.session_state.chat_history:
-                if message['role'] == 'user':
-                    st.markdown(f"""
-                        <div class='chat-message user'>
-                            <div class='content'>
-                                <strong>You:</strong> {message['content']}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                        <div class='chat-message assistant'>
-                            <div class='content'>
-                                <strong>Assistant:</strong> {message['content']}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+            # Display chat history: a summary of compacted turns, then the latest turns with older ones collapsed
+            if st.session_state.chat_history.summary:
+                st.caption(f"Earlier in this conversation: {st.session_state.chat_history.summary}")
+            rendered_chat = get_rendered_chat()
+            earlier = len(rendered_chat) - CHAT_RENDER_WINDOW
+            if earlier > 0 and st.toggle("Show earlier messages", key="show_earlier_chat", help=f"{earlier} older messages are hidden"):
+                st.markdown("\n\n".join(rendered_chat[:earlier]), unsafe_allow_html=True)
+            if rendered_chat:
+                st.markdown("\n\n".join(rendered_chat[max(earlier, 0):]), unsafe_allow_html=True)
             
-            # User input field
+            # User input field; the message is handled in its callback, so no extra rerun is needed
             with st.container():
-                user_input = st.text_input("Type your message:", key="user_input", placeholder="Ask me about products, orders, or stores...")
-            
-            # Process user input
-            if user_input and user_input != st.session_state.last_input:
-                # Check if input appears to be CSS code
-                if is_css_content(user_input):
-                    st.session_state.last_input = user_input  # Mark as processed
-                    handle_css_message(user_input)
-                    st.rerun()
-                else:
-                    # Update session state
-                    st.session_state.last_input = user_input
-                    
-                    # Add user message to chat history
-                    st.session_state.chat_history.append({'role': 'user', 'content': user_input})
-                    
-                    # Generate response
-                    if st.session_state.classifier is not None:
-                        response = generate_response(user_input, st.session_state.classifier)
-                        
-                        # Check if response contains CSS content
-                        if is_css_content(response):
-                            # Replace with a safe message
-                            response = "I generated a response with styling information, but I'll omit it to avoid display issues. Please try asking in a different way."
-                        
-                        # Add assistant message to chat history
-                        st.session_state.chat_history.append({'role': 'assistant', 'content': response})
-                    
-                    # Rerun to update the UI
-                    st.rerun()
+                st.text_input("Type your message:", key="user_input", placeholder="Ask me about products, orders, or stores...",
+                              on_change=handle_chat_input)
         
         # Product catalog tab
         with catalog_tab:
@@ -2336,40 +2433,16 @@ def main():
             # Show API Status
             st.sidebar.markdown("### API Status")
             
-            # Check Nike API
-            try:
-                nike_products = api_manager.nike.get_products(limit=1)
-                st.sidebar.success("✅ Nike API Connected")
-            except Exception as e:
-                st.sidebar.warning("⚠️ Nike API: Using Mock Data")
-                
-            # Check Adidas API
-            try:
-                adidas_products = api_manager.adidas.get_products(limit=1)
-                st.sidebar.success("✅ Adidas API Connected")
-            except Exception as e:
-                st.sidebar.warning("⚠️ Adidas API: Using Mock Data")
-                
-            # Check Puma API
-            try:
-                puma_products = api_manager.puma.get_products(limit=1)
-                st.sidebar.success("✅ Puma API Connected")
-            except Exception as e:
-                st.sidebar.warning("⚠️ Puma API: Using Mock Data")
-                
-            # Check Google Maps API
-            try:
-                maps_test = api_manager.google_maps.find_nearby_stores(40.7128, -74.0060)
-                st.sidebar.success("✅ Google Maps API Connected")
-            except Exception as e:
-                st.sidebar.warning("⚠️ Google Maps API: Using Mock Data")
-                
-            # Check Google Pay API
-            try:
-                pay_test = api_manager.google_pay.create_payment_token(1.00)
-                st.sidebar.success("✅ Google Pay API Connected")
-            except Exception as e:
-                st.sidebar.warning("⚠️ Google Pay API: Using Mock Data")
+            # Vendor status comes from the background health monitor, so rendering never calls a vendor
+            for vendor, status in get_health_monitor().status().items():
+                name = VENDOR_NAMES[vendor]
+                if status["healthy"] is None:
+                    st.sidebar.info(f"⏳ {name} API: Checking...")
+                elif status["healthy"]:
+                    latency = f" ({status['latency_ms']:.0f} ms)" if status["latency_ms"] else ""  # No latency for mock data
+                    st.sidebar.success(f"✅ {name} API Connected{latency}")
+                else:
+                    st.sidebar.warning(f"⚠️ {name} API: Using Mock Data")
 
             # Filter options
             col1, col2, col3 = st.columns(3)
@@ -2377,25 +2450,28 @@ def main():
             price_range = col2.slider("Price Range", 0, 200, (0, 200))
             show_in_stock_only = col3.checkbox("In Stock Only", True)
 
-            # Show data source
+            # Show data source and freshness
             st.info("🔄 Currently using mock data for development. Connect real API keys in .env file for live data.")
+            product_catalog = get_product_catalog()
+            catalog_age = product_catalog.age()
+            if catalog_age is not None:
+                st.caption(f"Catalog updated {int(catalog_age // 60)} min {int(catalog_age % 60)} s ago")
+            for brand, error in product_catalog.brand_errors.items():
+                st.caption(f"⚠️ {brand.capitalize()}: showing last known products ({error})")
 
             # Display products in a grid
             st.markdown("#### Featured Products")
             
             # Get all products that match the filters
-            filtered_products = []
-            
-            for brand, models in st.session_state.product_database.items():
-                if brand_filter == "All" or brand.capitalize() == brand_filter:
-                    for model_name, details in models.items():
-                        if price_range[0] <= details["price"] <= price_range[1]:
-                            if not show_in_stock_only or details["in_stock"]:
-                                filtered_products.append({
-                                    "brand": brand.capitalize(),
-                                    "model": model_name,
-                                    "details": details
-                                })
+            filtered_products = [
+                {"brand": brand.capitalize(), "model": model_name, "details": details}
+                for brand, model_name, details in st.session_state.catalog_index.query(
+                    brand=None if brand_filter == "All" else brand_filter.lower(),
+                    min_price=price_range[0],
+                    max_price=price_range[1],
+                    in_stock=True if show_in_stock_only else None
+                )
+            ]
             
             # Display products in rows of 3
             num_products = len(filtered_products)
@@ -0,0 +1,52 @@
+"""Per-message cost of is_css_content() on chat-sized and oversized inputs.
+
+Run with `python bench_text_processing.py`. Time per message should stay in
+the low microseconds for ordinary chat text and grow only linearly with
+message length, never with the number of colons, braces or words;
+check_scaling() asserts the latter and also runs as part of the tests.
+"""
+import timeit
+from text_processing import is_css_content
+
+MESSAGES = {
+    "greeting": "hi",
+    "question": "Do you have Nike Air Max in size 10?",
+    "store reply": "Our Quick Basket City Center is located at 123 Main Street, Downtown. "
+                   "Hours: 9 AM - 9 PM (Mon-Sat), 10 AM - 6 PM (Sun). Phone: 555-123-4567.",
+    "css": ".stButton > button { background-color: #4CAF50; padding: 10px; border-radius: 5px; }"
+}
+
+SCALING_UNITS = [("words", "shoe "), ("colons", "a:"), ("braces", "ab {"), ("no markup", "x")]
+SCALING_REPEATS = (1000, 4000, 16000)
+MAX_SCALING_RATIO = 3  # Largest over smallest input in ns/char; quadratic time would be about 16
+
+def per_call_us(text, number):
+    return timeit.timeit(lambda: is_css_content(text), number=number) / number * 1e6
+
+def ns_per_char(text, number=20):
+    """Best of three runs, to keep scheduler noise out of the ratio"""
+    best = min(timeit.repeat(lambda: is_css_content(text), number=number, repeat=3))
+    return best / number * 1e9 / len(text)
+
+def check_scaling():
+    for name, unit in SCALING_UNITS:
+        small, large = (ns_per_char(unit * repeat) for repeat in (SCALING_REPEATS[0], SCALING_REPEATS[-1]))
+        assert large < small * MAX_SCALING_RATIO, \
+            f"is_css_content() on {name}: {small:.2f} ns/char at {SCALING_REPEATS[0]} repeats, {large:.2f} at {SCALING_REPEATS[-1]}"
+
+def main():
+    print("Typical messages")
+    for name, text in MESSAGES.items():
+        print(f"  {name:<12} {len(text):>6} chars  {per_call_us(text, 20000):8.2f} us")
+
+    print("Scaling (time per character should stay flat)")
+    for name, unit in SCALING_UNITS:
+        for repeat in SCALING_REPEATS:
+            text = unit * repeat
+            elapsed = per_call_us(text, 20)
+            print(f"  {name:<12} {len(text):>6} chars  {elapsed:8.1f} us  {elapsed * 1000 / len(text):6.2f} ns/char")
+    check_scaling()
+    print("Scaling check passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from config import CATALOG_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Default product descriptions by brand
+DESCRIPTION_TEMPLATES = {
+    'nike': "The {name} delivers comfort and style.",
+    'adidas': "The {name} offers premium performance.",
+    'puma': "The {name} combines style and comfort."
+}
+
+def build_product_database(products: Dict) -> Dict:
+    """Turn APIManager.get_all_products() output into {brand: {product name: details}}"""
+    product_database = {}
+    for brand, payload in products.items():
+        template = DESCRIPTION_TEMPLATES.get(brand, "The {name} is ready for your next run.")
+        product_database[brand] = {}
+        for product in payload.get('products', []):
+            product_database[brand][product['name']] = {
+                'id': product.get('id'),
+                'price': product['price'],
+                'sizes': product['sizes'],
+                'colors': product['colors'],
+                'in_stock': product['in_stock'],
+                'image': product.get('image', 'default_image_url'),
+                'description': product.get('description', template.format(name=product['name']))
+            }
+    return product_database
+
+def freeze(value):
+    """Deep read-only copy: dicts become mappingproxies and lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def catalog_version(product_database) -> str:
+    """Fingerprint the brands, models and colors of a product database"""
+    digest = hashlib.sha256()
+    for brand in sorted(product_database):
+        for model in sorted(product_database[brand]):
+            colors = ",".join(product_database[brand][model].get('colors', []))
+            digest.update(f"{brand}|{model}|{colors}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+class CatalogIndex:
+    """Columnar, indexed view of a product database for filtered queries.
+
+    Rows keep the catalog's brand/model order. Prices are held sorted for
+    binary-searched range queries, stock as a boolean column, and brands,
+    sizes, colors and model-name trigrams as inverted lists of row ids, so a
+    query only touches the rows that can match.
+    """
+    def __init__(self, product_database):
+        self.rows: List[Tuple[str, str, Dict]] = [
+            (brand, model, details)
+            for brand, models in product_database.items()
+            for model, details in models.items()
+        ]
+        prices = np.array([details['price'] for _, _, details in self.rows], dtype=float)
+        self.price_order = np.argsort(prices, kind='stable')
+        self.sorted_prices = prices[self.price_order]
+        self.in_stock = np.array([bool(details['in_stock']) for _, _, details in self.rows], dtype=bool)
+
+        brands: Dict[str, List[int]] = {}
+        sizes: Dict[float, List[int]] = {}
+        colors: Dict[str, List[int]] = {}
+        trigrams: Dict[str, List[int]] = {}
+        for row, (brand, model, details) in enumerate(self.rows):
+            brands.setdefault(brand, []).append(row)
+            for size in details['sizes']:
+                sizes.setdefault(float(size), []).append(row)
+            for color in details['colors']:
+                colors.setdefault(color.lower(), []).append(row)
+            name = model.lower()
+            for start in range(len(name) - 2):
+                trigrams.setdefault(name[start:start + 3], []).append(row)
+
+        to_array = lambda index: {key: np.array(sorted(set(rows)), dtype=int) for key, rows in index.items()}
+        self.by_brand = to_array(brands)
+        self.by_size = to_array(sizes)
+        self.by_color = to_array(colors)
+        self.by_trigram = to_array(trigrams)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _price_range(self, min_price: float = None, max_price: float = None) -> np.ndarray:
+        lo = 0 if min_price is None else np.searchsorted(self.sorted_prices, min_price, side='left')
+        hi = len(self.rows) if max_price is None else np.searchsorted(self.sorted_prices, max_price, side='right')
+        return np.sort(self.price_order[lo:hi])
+
+    def query(self, brand: str = None, min_price: float = None, max_price: float = None,
+              in_stock: bool = None, size: float = None, color: str = None,
+              exclude_brand: str = None) -> List[Tuple[str, str, Dict]]:
+        """Return (brand, model, details) rows matching every given filter, in catalog order"""
+        candidates = None
+        for ids in (
+            self.by_brand.get(brand, np.empty(0, dtype=int)) if brand is not None else None,
+            self.by_size.get(float(size), np.empty(0, dtype=int)) if size is not None else None,
+            self.by_color.get(color.lower(), np.empty(0, dtype=int)) if color is not None else None
+        ):
+            if ids is not None:
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+
+        if min_price is not None or max_price is not None or candidates is None:
+            in_range = self._price_range(min_price, max_price)
+            candidates = in_range if candidates is None else np.intersect1d(candidates, in_range, assume_unique=True)
+
+        if in_stock is not None:
+            candidates = candidates[self.in_stock[candidates] == in_stock]
+        if exclude_brand is not None and exclude_brand in self.by_brand:
+            candidates = np.setdiff1d(candidates, self.by_brand[exclude_brand], assume_unique=True)
+
+        return [self.rows[row] for row in candidates]
+
+    def matching_models(self, brand: str, model: str) -> List[Tuple[str, Dict]]:
+        """(name, details) of every product of `brand` whose name contains `model`, in catalog order"""
+        candidates = self.by_brand.get(brand.lower())
+        if candidates is None:
+            return []
+        needle = model.lower()
+        # Narrow to names sharing every trigram of the needle, then confirm the substring
+        for start in range(len(needle) - 2):
+            if len(candidates) == 0:
+                break
+            rows = self.by_trigram.get(needle[start:start + 3], np.empty(0, dtype=int))
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return [(self.rows[row][1], self.rows[row][2])
+                for row in candidates if needle in self.rows[row][1].lower()]
+
+    def find_model(self, brand: str, model: str) -> Optional[Tuple[str, Dict]]:
+        """First (name, details) of `brand` whose name contains `model`, or None"""
+        matches = self.matching_models(brand, model)
+        return matches[0] if matches else None
+
+class CatalogSnapshot(NamedTuple):
+    products: MappingProxyType  # {brand: {product name: details}}, read-only
+    version: Optional[str]
+    updated_at: Optional[float]
+    index: CatalogIndex
+
+EMPTY_SNAPSHOT = CatalogSnapshot(MappingProxyType({}), None, None, CatalogIndex({}))
+
+class ProductCatalog:
+    """Process-wide product catalog shared read-only by every session.
+
+    Each refresh builds a complete new snapshot and swaps it in with a single
+    reference assignment, so readers always see one consistent catalog and
+    never wait on a vendor once the first snapshot exists. A brand that fails
+    during a refresh keeps its last good products instead of disappearing.
+    """
+    def __init__(self, api_manager, max_age: float = CATALOG_REFRESH_INTERVAL):
+        self.api_manager = api_manager
+        self.max_age = max_age
+        self.brand_errors: Dict[str, str] = {}  # Brands served from older data, with the reason
+        self._current = EMPTY_SNAPSHOT
+        self._last_good: Dict[str, Dict] = {}
+        self._refresh_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._current
+
+    def age(self) -> Optional[float]:
+        """Seconds since the current snapshot was fetched, or None before the first one"""
+        updated_at = self._current.updated_at
+        return None if updated_at is None else time.time() - updated_at
+
+    def _fetch(self) -> Dict:
+        """Pull every brand, falling back to the last good payload of brands that fail"""
+        results = {}
+        errors = {}
+        # Bypass the response cache, whose lifetime is longer than the refresh interval
+        for brand, payload in self.api_manager.get_all_products(fresh=True).items():
+            if payload.get('error') and brand in self._last_good:
+                errors[brand] = payload['error']
+                results[brand] = self._last_good[brand]
+            else:
+                if payload.get('error'):
+                    errors[brand] = payload['error']
+                else:
+                    self._last_good[brand] = payload
+                results[brand] = payload
+        self.brand_errors = errors
+        return results
+
+    def refresh(self, wait: bool = True) -> bool:
+        """Fetch the catalog and swap in a new snapshot.
+
+        Only one refresh runs at a time. With wait=False the call returns
+        immediately if a refresh is already in flight.
+        """
+        started = self._current.updated_at
+        if not self._refresh_lock.acquire(blocking=wait):
+            return False
+        try:
+            if self._current.updated_at != started:
+                return True  # Another caller refreshed while we waited
+            products = freeze(build_product_database(self._fetch()))
+            self._current = CatalogSnapshot(products, catalog_version(products), time.time(), CatalogIndex(products))
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def get(self) -> CatalogSnapshot:
+        """Current snapshot; loads the first one, and refreshes stale ones in the background"""
+        snapshot = self._current
+        if snapshot.updated_at is None:
+            self.refresh()
+            return self._current
+        if time.time() - snapshot.updated_at > self.max_age and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, kwargs={"wait": False}, daemon=True).start()
+        return snapshot
+
+    def start(self, interval: float = None):
+        """Refresh every `interval` seconds (max_age by default) on a daemon thread"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        interval = self.max_age if interval is None else interval
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._run, args=(interval,),
+                                           name="catalog-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.refresh(wait=False)
+            except Exception as e:
+                # Keep serving the last snapshot; the next tick tries again
+                logger.warning("Catalog refresh failed: %s", e)
+            self._stop.wait(interval)
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+from config import CHAT_STORE_FILE, CHAT_HISTORY_MAX_MESSAGES
+
+SUMMARY_QUESTIONS = 5  # Most recent user questions quoted in a summary
+SUMMARY_QUESTION_LENGTH = 60
+
+def summarize_messages(messages: List[Dict], earlier: int = 0) -> str:
+    """Short extractive summary of compacted turns: how many there were and the last few questions"""
+    count = earlier + len(messages)
+    questions = [m['content'] for m in messages if m['role'] == 'user'][-SUMMARY_QUESTIONS:]
+    quoted = [f'"{q[:SUMMARY_QUESTION_LENGTH]}…"' if len(q) > SUMMARY_QUESTION_LENGTH else f'"{q}"' for q in questions]
+    summary = f"{count} earlier messages."
+    if quoted:
+        summary += " You asked: " + "; ".join(quoted)
+    return summary
+
+class ChatStore:
+    """Append-only SQLite log of chat messages, one conversation per session id.
+
+    Safe to share between threads and processes; every call uses its own
+    connection. Sessions longer than `max_messages` are compacted: their
+    oldest messages are folded into a summary row and deleted.
+    """
+    def __init__(self, path: str = CHAT_STORE_FILE, max_messages: int = CHAT_HISTORY_MAX_MESSAGES):
+        self.path = path
+        self.max_messages = max_messages
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS chat_messages ("
+                         "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, role TEXT, content TEXT, created REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS chat_messages_session ON chat_messages (session_id, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS chat_summaries (session_id TEXT PRIMARY KEY, summary TEXT, compacted INTEGER)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def append(self, session_id: str, message: Dict):
+        conn = self._connect()
+        try:
+            conn.execute("INSERT INTO chat_messages (session_id, role, content, created) VALUES (?, ?, ?, ?)",
+                         (session_id, message['role'], message['content'], time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self, session_id: str, limit: int) -> List[Dict]:
+        """The session's last `limit` messages, oldest first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT role, content FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                                (session_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [{'role': role, 'content': content} for role, content in reversed(rows)]
+
+    def summary(self, session_id: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT summary FROM chat_summaries WHERE session_id = ?", (session_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def compact(self, session_id: str, keep: int = None) -> Optional[str]:
+        """Fold all but the last `keep` messages into the session summary; returns the summary"""
+        keep = self.max_messages if keep is None else keep
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, role, content FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                                (session_id, keep)).fetchall()
+            row = conn.execute("SELECT summary, compacted FROM chat_summaries WHERE session_id = ?", (session_id,)).fetchone()
+            summary, compacted = row if row else (None, 0)
+            if rows:
+                old = [{'role': role, 'content': content} for _, role, content in reversed(rows)]
+                summary = summarize_messages(old, compacted)
+                conn.execute("INSERT OR REPLACE INTO chat_summaries (session_id, summary, compacted) VALUES (?, ?, ?)",
+                             (session_id, summary, compacted + len(old)))
+                conn.execute("DELETE FROM chat_messages WHERE session_id = ? AND id <= ?", (session_id, rows[0][0]))
+            conn.commit()
+            return summary
+        finally:
+            conn.close()
+
+    def clear(self, session_id: str):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM chat_summaries WHERE session_id = ?", (session_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+class ChatHistory:
+    """One session's conversation: a ring buffer of recent messages backed by a ChatStore.
+
+    Behaves like a read-only list of {'role', 'content'} dicts for rendering
+    and scanning; append() and clear() also update the persisted log. Messages
+    that fall out of the buffer are compacted into `summary`.
+    """
+    def __init__(self, store: Optional[ChatStore], session_id: str, max_messages: int = CHAT_HISTORY_MAX_MESSAGES):
+        self.store = store
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._messages = deque(store.load(session_id, max_messages) if store else (), maxlen=max_messages)
+        self._dropped = 0  # Messages rolled out of the buffer since the last compaction
+        self.summary = store.summary(session_id) if store else None
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._messages))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._messages)[index]
+        return self._messages[index]
+
+    def append(self, message: Dict):
+        with self._lock:
+            if len(self._messages) == self.max_messages:
+                self._dropped += 1
+            self._messages.append(message)
+            if self.store:
+                self.store.append(self.session_id, message)
+                # Compact in batches so the log never holds more than twice the buffer
+                if self._dropped >= self.max_messages:
+                    self.summary = self.store.compact(self.session_id, self.max_messages)
+                    self._dropped = 0
+
+    def retain(self, keep: Callable[[Dict], bool]):
+        """Drop buffered messages for which keep(message) is false (the log is left as is)"""
+        with self._lock:
+            self._messages = deque((m for m in self._messages if keep(m)), maxlen=self.max_messages)
+
+    def clear(self):
+        """Forget the conversation, including its persisted messages and summary"""
+        with self._lock:
+            self._messages.clear()
+            self._dropped = 0
+            self.summary = None
+            if self.store:
+                self.store.clear(self.session_id)
@@ -22,10 +22,69 @@ GOOGLE_PAY_BASE_URL = "https://pay.google.com/gp/v1"
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'True').lower() == 'true'
 MOCK_API_RESPONSES = os.getenv('MOCK_API_RESPONSES', 'True').lower() == 'true'  # Use mock data for development
 
+# Concurrency Settings
+API_MAX_WORKERS = int(os.getenv('API_MAX_WORKERS', '16'))  # Threads for concurrent vendor calls
+BRAND_REQUEST_TIMEOUT = float(os.getenv('BRAND_REQUEST_TIMEOUT', '5'))  # Seconds to wait for each brand
+
+# HTTP Connection Pool Settings
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))  # Max keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))  # Seconds, doubled on each retry
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))  # Seconds per request
+
 # Cache Settings
 CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', '3600'))  # Default 1 hour
 MAX_CACHE_ITEMS = int(os.getenv('MAX_CACHE_ITEMS', '1000'))
+STOCK_CACHE_TIMEOUT = int(os.getenv('STOCK_CACHE_TIMEOUT', '60'))  # Availability changes quickly
+DETAILS_CACHE_TIMEOUT = int(os.getenv('DETAILS_CACHE_TIMEOUT', '86400'))  # Product and store details rarely change
+
+# Catalog Settings
+CATALOG_REFRESH_INTERVAL = int(os.getenv('CATALOG_REFRESH_INTERVAL', '300'))  # Max snapshot age in seconds
 
 # API Rate Limits
 RATE_LIMIT_CALLS = int(os.getenv('RATE_LIMIT_CALLS', '100'))
-RATE_LIMIT_PERIOD = int(os.getenv('RATE_LIMIT_PERIOD', '3600'))  # Period in seconds 
\ No newline at end of file
+RATE_LIMIT_PERIOD = int(os.getenv('RATE_LIMIT_PERIOD', '3600'))  # Period in seconds 
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '2'))  # Seconds a call may queue for a token
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', '')  # SQLite file shared by all processes; empty = per process
+
+# Circuit Breaker Settings
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # Consecutive failures before a vendor is cut off
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))  # Seconds before a trial request is let through
+
+# Request Hedging Settings
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', 'False').lower() == 'true'  # Re-send slow read-only vendor GETs
+# Comma-separated read-only client methods ("get_products") or vendor operations ("nike.get_products") to hedge,
+# each optionally "=seconds" for a fixed hedge delay instead of the observed percentile
+HEDGE_OPERATIONS = os.getenv('HEDGE_OPERATIONS', 'get_products,get_product_details,find_nearby_stores,get_store_details')
+HEDGE_MAX_IN_FLIGHT = int(os.getenv('HEDGE_MAX_IN_FLIGHT', '4'))  # Hedge requests allowed at once; beyond that requests aren't hedged
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))  # Observed latency percentile after which a request is hedged
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))  # Latencies an operation needs before it is hedged
+HEDGE_LATENCY_WINDOW = int(os.getenv('HEDGE_LATENCY_WINDOW', '200'))  # Recent latencies kept per operation
+
+# Model Settings
+MODEL_ARTIFACT_DIR = os.getenv('MODEL_ARTIFACT_DIR', 'models')  # Fitted intent model artifacts
+
+# Store Directory Settings
+STORE_DIRECTORY_FILE = os.getenv('STORE_DIRECTORY_FILE', os.path.join('data', 'store_directory.json'))  # Persisted store details
+STORE_DIRECTORY_MAX_AGE = int(os.getenv('STORE_DIRECTORY_MAX_AGE', '86400'))  # Seconds before stores are re-fetched
+STORE_DIRECTORY_RETRY_INTERVAL = float(os.getenv('STORE_DIRECTORY_RETRY_INTERVAL', '60'))  # Seconds between background retries while Maps is down
+STORE_DIRECTORY_TIMEOUT = float(os.getenv('STORE_DIRECTORY_TIMEOUT', '10'))  # Seconds to wait for all store details
+
+# Store Map Settings
+STORE_MAP_SEED = int(os.getenv('STORE_MAP_SEED', '42'))  # Seed for the demo store locations
+STORE_MAP_CLUSTER_THRESHOLD = int(os.getenv('STORE_MAP_CLUSTER_THRESHOLD', '50'))  # Cluster markers above this many stores
+
+# Chat Settings
+CHAT_RENDER_WINDOW = int(os.getenv('CHAT_RENDER_WINDOW', '50'))  # Most recent messages shown; older ones are collapsed
+CHAT_STORE_FILE = os.getenv('CHAT_STORE_FILE', os.path.join('data', 'chat_history.db'))  # SQLite log of every conversation
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv('CHAT_HISTORY_MAX_MESSAGES', '200'))  # Recent messages kept in memory per session
+
+# Vendor Health Monitor Settings
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '60'))  # Seconds between probes of each vendor
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '3'))  # Seconds before a probe counts as failed
+HEALTH_CHECK_WINDOW = int(os.getenv('HEALTH_CHECK_WINDOW', '20'))  # Probes kept for rolling latency/error stats
+
+# Response Budget Settings
+RESPONSE_DEADLINE = float(os.getenv('RESPONSE_DEADLINE', '2'))  # Seconds a chat reply may take end to end
+LIVE_STOCK_BUDGET = float(os.getenv('LIVE_STOCK_BUDGET', '0.5'))  # Seconds left needed to ask a vendor for live stock
+RECOMMENDATION_BUDGET = float(os.getenv('RECOMMENDATION_BUDGET', '0.2'))  # Seconds left needed to add recommendations
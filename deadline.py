@@ -0,0 +1,37 @@
+import time
+from typing import List
+
+class Deadline:
+    """Time budget for one unit of work, such as answering a chat message.
+
+    Stages check has() before optional work and pass remaining() on as the
+    timeout of anything that blocks, so the whole unit finishes within the
+    budget however slow its parts are. Skipped stages are recorded by name.
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+        self.skipped: List[str] = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def has(self, seconds: float) -> bool:
+        """True if at least `seconds` of the budget are left"""
+        return self.remaining() >= seconds
+
+    def skip(self, stage: str):
+        """Record a stage dropped to stay within the budget"""
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    def __repr__(self):
+        return f"Deadline({self.seconds}s, {self.remaining():.3f}s left, skipped={self.skipped})"
@@ -0,0 +1,113 @@
+import requests
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from config import MOCK_API_RESPONSES, HEALTH_CHECK_INTERVAL, HEALTH_CHECK_TIMEOUT, HEALTH_CHECK_WINDOW
+
+# Vendors shown in the sidebar, in display order
+VENDOR_NAMES = {
+    "nike": "Nike",
+    "adidas": "Adidas",
+    "puma": "Puma",
+    "google_maps": "Google Maps",
+    "google_pay": "Google Pay"
+}
+
+PROBE_STAGGER = 0.2  # Seconds between the first probes of consecutive vendors
+
+class VendorHealth:
+    """Rolling record of one vendor's most recent probes"""
+    def __init__(self, window: int = HEALTH_CHECK_WINDOW):
+        self.samples = deque(maxlen=window)  # (ok, latency in seconds)
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def record(self, ok: bool, latency: float, error: str = None):
+        self.samples.append((ok, latency))
+        self.last_error = None if ok else error
+        self.checked_at = time.time()
+
+    def status(self) -> Dict:
+        if not self.samples:
+            return {"healthy": None, "checked_at": None}
+        latencies = sorted(latency for _, latency in self.samples)
+        return {
+            "healthy": self.samples[-1][0],
+            "latency_ms": latencies[len(latencies) // 2] * 1000,  # Median
+            "error_rate": sum(1 for ok, _ in self.samples if not ok) / len(self.samples),
+            "samples": len(self.samples),
+            "last_error": self.last_error,
+            "checked_at": self.checked_at
+        }
+
+class VendorHealthMonitor:
+    """Probes every vendor in the background and keeps rolling health stats.
+
+    Each vendor has its own daemon thread and schedule, so a slow vendor never
+    delays the others, and readers such as the sidebar only look at the
+    recorded status instead of calling the vendor themselves.
+    """
+    def __init__(self, api_manager, interval: float = HEALTH_CHECK_INTERVAL,
+                 timeout: float = HEALTH_CHECK_TIMEOUT, window: int = HEALTH_CHECK_WINDOW):
+        self.api_manager = api_manager
+        self.interval = interval
+        self.timeout = timeout
+        self.health = {vendor: VendorHealth(window) for vendor in VENDOR_NAMES}
+        self.session = requests.Session()  # Separate from the API pool, and never retried: one probe is one attempt
+        self._lock = threading.Lock()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+
+    def _base_url(self, vendor: str) -> str:
+        return getattr(self.api_manager.config, f"{vendor.upper()}_BASE_URL")
+
+    def probe(self, vendor: str) -> bool:
+        """One lightweight check: can we reach the vendor at all?
+
+        Brands serve mock data in development, so they are always up then.
+        Otherwise any HTTP answer below 500 from the base URL counts as up; no
+        real API call is made, so probes cost no rate-limit tokens (or payment
+        tokens).
+        """
+        if MOCK_API_RESPONSES and vendor in self.api_manager.brands:
+            ok, error, latency = True, None, 0.0
+        else:
+            started = time.perf_counter()
+            try:
+                response = self.session.head(self._base_url(vendor), timeout=self.timeout, allow_redirects=False)
+                ok = response.status_code < 500
+                error = None if ok else f"HTTP {response.status_code}"
+            except Exception as e:
+                ok, error = False, str(e)
+            latency = time.perf_counter() - started
+        with self._lock:
+            self.health[vendor].record(ok, latency, error)
+        return ok
+
+    def _run(self, vendor: str, offset: float):
+        # Stagger the first probes so the vendors are not all checked at the same moment
+        if self._stop.wait(offset):
+            return
+        while not self._stop.is_set():
+            self.probe(vendor)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start one probe thread per vendor (no-op for vendors already running)"""
+        self._stop.clear()
+        for i, vendor in enumerate(self.health):
+            thread = self._threads.get(vendor)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=self._run, args=(vendor, i * PROBE_STAGGER),
+                                          name=f"health-{vendor}", daemon=True)
+                self._threads[vendor] = thread
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Dict]:
+        """{vendor: rolling status}; 'healthy' is None until the vendor's first probe finishes"""
+        with self._lock:
+            return {vendor: health.status() for vendor, health in self.health.items()}
@@ -1,10 +1,21 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import st_folium
+from folium.plugins import MarkerCluster
+import hashlib
+import json
 import random
+from config import STORE_MAP_SEED, STORE_MAP_CLUSTER_THRESHOLD
 
-def generate_random_stores(center_lat, center_lng, num_stores=5, radius_km=10):
-    """Generate random store locations within a radius of the center point"""
+# Mumbai coordinates
+MUMBAI_CENTER = [19.0760, 72.8777]
+
+def generate_random_stores(center_lat, center_lng, num_stores=5, radius_km=10, seed=STORE_MAP_SEED):
+    """Generate random store locations within a radius of the center point.
+
+    The same seed always gives the same stores, so the map stays put across reruns.
+    """
+    rng = random.Random(seed)
     stores = []
     for i in range(num_stores):
         # Convert radius from km to degrees (approximate)
@@ -12,16 +23,16 @@ def generate_random_stores(center_lat, center_lng, num_stores=5, radius_km=10):
         radius_lng = radius_km / (111 * abs(center_lat / 90))  # Adjust for latitude
         
         # Generate random offset
-        lat = center_lat + random.uniform(-radius_lat, radius_lat)
-        lng = center_lng + random.uniform(-radius_lng, radius_lng)
+        lat = center_lat + rng.uniform(-radius_lat, radius_lat)
+        lng = center_lng + rng.uniform(-radius_lng, radius_lng)
         
         store_name = f"Quick Basket Store #{i+1}"
-        store_type = random.choice(["Flagship Store", "Express Store", "Outlet Store"])
+        store_type = rng.choice(["Flagship Store", "Express Store", "Outlet Store"])
         stores.append({
             "name": store_name,
             "type": store_type,
             "location": [lat, lng],
-            "features": random.sample([
+            "features": rng.sample([
                 "Nike Collection", 
                 "Adidas Collection", 
                 "Puma Collection",
@@ -32,33 +43,31 @@ def generate_random_stores(center_lat, center_lng, num_stores=5, radius_km=10):
         })
     return stores
 
-def create_store_map():
-    st.title("Quick Basket Store Locations")
-    
-    # Mumbai coordinates
-    mumbai_center = [19.0760, 72.8777]
-    
-    # Generate random store locations
-    stores = generate_random_stores(
-        center_lat=mumbai_center[0],
-        center_lng=mumbai_center[1],
-        num_stores=8,  # Number of random stores
-        radius_km=10   # Within 10km radius
-    )
-    
-    # Create the base map
-    m = folium.Map(location=mumbai_center, zoom_start=12)
+@st.cache_data(show_spinner=False)
+def get_map_stores(center_lat, center_lng, num_stores=8, radius_km=10, seed=STORE_MAP_SEED):
+    """Store locations shown on the map, generated once per set of arguments"""
+    return generate_random_stores(center_lat, center_lng, num_stores, radius_km, seed)
+
+def stores_version(stores) -> str:
+    """Fingerprint of a store list, used to key the rendered map"""
+    return hashlib.sha256(json.dumps(stores, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def create_store_map(center, stores, cluster_threshold=STORE_MAP_CLUSTER_THRESHOLD):
+    """Build the folium map with the HQ marker, one marker per store and the delivery zone"""
+    m = folium.Map(location=center, zoom_start=12)
     
     # Add HQ marker
     folium.Marker(
-        mumbai_center,
+        center,
         popup="Quick Basket HQ - Mumbai",
         icon=folium.Icon(color='red', icon='info-sign')
     ).add_to(m)
     
+    # Cluster markers when there are too many to draw individually
+    store_layer = MarkerCluster(name="Stores").add_to(m) if len(stores) > cluster_threshold else m
+    
     # Add store markers with custom icons and popups
     for store in stores:
-        # Create detailed popup HTML
         popup_html = f"""
         <div style='width: 200px'>
             <h4>{store['name']}</h4>
@@ -70,7 +79,6 @@ def create_store_map():
         </div>
         """
         
-        # Add marker with custom icon
         folium.Marker(
             store['location'],
             popup=folium.Popup(popup_html, max_width=300),
@@ -79,19 +87,33 @@ def create_store_map():
                 icon='shopping-cart',
                 prefix='fa'
             )
-        ).add_to(m)
+        ).add_to(store_layer)
     
     # Add circle showing delivery radius
     folium.Circle(
-        mumbai_center,
+        center,
         radius=10000,  # 10km in meters
         color='green',
         fill=True,
         popup='Delivery Zone'
     ).add_to(m)
     
-    # Display the map
-    st_folium(m, width=700, height=500)
+    return m
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def render_store_map(version, center, _stores):
+    """Rendered map HTML, built once per store-set version and reused by every rerun and session"""
+    return create_store_map(center, _stores).get_root().render()
+
+def show_map(center, stores, height=500):
+    """Display the cached map for this store set"""
+    components.html(render_store_map(stores_version(stores), list(center), stores), height=height)
+
+def store_map_page():
+    st.title("Quick Basket Store Locations")
+    
+    stores = get_map_stores(MUMBAI_CENTER[0], MUMBAI_CENTER[1])
+    show_map(MUMBAI_CENTER, stores)
     
     # Display store list
     st.subheader("Store Directory")
@@ -103,4 +125,4 @@ def create_store_map():
             st.write(f"**Location:** {store['location'][0]:.4f}, {store['location'][1]:.4f}")
 
 if __name__ == "__main__":
-    create_store_map() 
\ No newline at end of file
+    store_map_page()
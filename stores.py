@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import wait
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sklearn.neighbors import BallTree
+from config import STORE_DIRECTORY_FILE, STORE_DIRECTORY_MAX_AGE, STORE_DIRECTORY_RETRY_INTERVAL, STORE_DIRECTORY_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Where to search for stores (NYC)
+DEFAULT_SEARCH_LOCATION = (40.7128, -74.0060)
+
+# Used when Maps is unavailable and no directory has been saved yet
+DEFAULT_STORES = [
+    {
+        "name": "Quick Basket City Center",
+        "address": "123 Main Street, Downtown",
+        "hours": "9 AM - 9 PM (Mon-Sat), 10 AM - 6 PM (Sun)",
+        "phone": "555-123-4567",
+        "features": ["Nike Shop-in-shop", "Shoe fitting service", "Click & Collect"]
+    }
+]
+
+def store_from_details(place: Dict, details: Dict) -> Dict:
+    """Build a store entry from a nearby-search result and its place details"""
+    store = {
+        "name": details.get('name', 'Quick Basket Store'),
+        "address": details.get('formatted_address', 'Address not available'),
+        "hours": details.get('opening_hours', {}).get('weekday_text', 'Hours not available'),
+        "phone": details.get('formatted_phone_number', 'Phone not available'),
+        "features": ["Click & Collect", "Shoe fitting service"],  # Default features
+        "place_id": place.get('place_id')
+    }
+    location = place.get('geometry', {}).get('location')
+    if location:
+        store["location"] = [location['lat'], location['lng']]
+    return store
+
+EARTH_RADIUS_KM = 6371.0
+
+class StoreIndex:
+    """Nearest-store and radius queries over stores with a [lat, lng] location.
+
+    Built once per store list on a haversine ball tree, so lookups stay
+    logarithmic in the number of stores. Stores without a location are
+    left out. Distances are great-circle kilometres.
+    """
+    def __init__(self, stores: List[Dict]):
+        self.stores = [store for store in stores if store.get('location')]
+        self._tree = None
+        if self.stores:
+            self._tree = BallTree(np.radians([store['location'] for store in self.stores]), metric='haversine')
+
+    def __len__(self):
+        return len(self.stores)
+
+    def nearest(self, lat: float, lng: float, k: int = 1) -> List[Tuple[Dict, float]]:
+        """Up to k (store, distance in km) pairs, closest first"""
+        if self._tree is None or k < 1:
+            return []
+        distances, indices = self._tree.query(np.radians([[lat, lng]]), k=min(k, len(self.stores)))
+        return [(self.stores[i], float(d * EARTH_RADIUS_KM)) for d, i in zip(distances[0], indices[0])]
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[Dict, float]]:
+        """Every (store, distance in km) pair within radius_km, closest first"""
+        if self._tree is None:
+            return []
+        indices, distances = self._tree.query_radius(
+            np.radians([[lat, lng]]), r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        return [(self.stores[i], float(d * EARTH_RADIUS_KM)) for d, i in zip(distances[0], indices[0])]
+
+class StoreDirectory:
+    """Process-wide store list shared by every session.
+
+    Store details are fetched from Google Maps concurrently, then kept in
+    memory and saved to a local JSON file, so new sessions (and restarts)
+    make no Maps calls until the directory is older than `max_age`, at
+    which point it is re-fetched in the background. If Maps is down and
+    nothing has been saved, only the first call waits on Maps; later ones
+    get DEFAULT_STORES while a retry runs in the background at most every
+    `retry_interval` seconds.
+    """
+    def __init__(self, api_manager, path: str = STORE_DIRECTORY_FILE,
+                 max_age: float = STORE_DIRECTORY_MAX_AGE, location=DEFAULT_SEARCH_LOCATION,
+                 retry_interval: float = STORE_DIRECTORY_RETRY_INTERVAL, timeout: float = STORE_DIRECTORY_TIMEOUT):
+        self.api_manager = api_manager
+        self.path = path
+        self.max_age = max_age
+        self.location = location
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._stores: Optional[List[Dict]] = None
+        self._updated_at: Optional[float] = None
+        self._failed_at: Optional[float] = None  # Last refresh that found Maps unavailable
+        self._attempts = 0
+        self._index = StoreIndex([])
+        self._refresh_lock = threading.Lock()
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self._stores, self._updated_at = saved['stores'], saved['updated_at']
+            self._index = StoreIndex(self._stores)
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"updated_at": self._updated_at, "stores": self._stores}, f)
+            os.replace(tmp_path, self.path)  # Atomic, so readers never see a partial file
+        except OSError as e:
+            logger.warning("Could not save store directory: %s", e)
+
+    def _fetch(self) -> Optional[List[Dict]]:
+        """Nearby stores with their details, or None if Maps is unavailable"""
+        maps = self.api_manager.google_maps
+        try:
+            nearby = maps.find_nearby_stores(latitude=self.location[0], longitude=self.location[1])
+        except Exception as e:
+            logger.warning("Store search failed: %s", e)
+            return None
+        if 'results' not in nearby:
+            return None
+
+        places = nearby['results']
+        futures = [self.api_manager.executor.submit(maps.get_store_details, place['place_id']) for place in places]
+        done, _ = wait(futures, timeout=self.timeout)
+        stores = []
+        for place, future in zip(places, futures):
+            if future not in done:
+                future.cancel()  # Too slow; the store is picked up by the next refresh
+            elif future.exception() is None and 'result' in future.result():
+                stores.append(store_from_details(place, future.result()['result']))
+        return stores
+
+    def refresh(self, wait: bool = True) -> bool:
+        """Re-fetch and save the directory; keeps the current one if Maps is unavailable"""
+        started = self._attempts
+        if not self._refresh_lock.acquire(blocking=wait):
+            return False
+        try:
+            if self._attempts != started:
+                return self._failed_at is None  # Another caller refreshed while we waited
+            self._attempts += 1
+            stores = self._fetch()
+            if stores is None:
+                self._failed_at = time.time()
+                return False
+            self._stores, self._updated_at, self._failed_at = stores, time.time(), None
+            self._index = StoreIndex(stores)
+            self._save()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    @property
+    def index(self) -> StoreIndex:
+        """Spatial index over the current stores, rebuilt whenever they change"""
+        return self._index
+
+    def age(self) -> Optional[float]:
+        return None if self._updated_at is None else time.time() - self._updated_at
+
+    def _refresh_in_background(self):
+        """Start a refresh thread unless one is running or Maps failed within retry_interval"""
+        if self._failed_at is not None and time.time() - self._failed_at < self.retry_interval:
+            return
+        if not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, kwargs={"wait": False}, daemon=True).start()
+
+    def get(self) -> List[Dict]:
+        """Current store list; loads or fetches it on first use and refreshes stale ones in the background"""
+        if self._stores is None:
+            with self._refresh_lock:
+                if self._stores is None:
+                    self._load()
+            if self._stores is None and self._failed_at is None:
+                self.refresh()
+        if self._stores is None:
+            self._refresh_in_background()  # Maps was down: serve the defaults meanwhile
+            return [dict(store) for store in DEFAULT_STORES]
+        if not self._stores:
+            return [dict(store) for store in DEFAULT_STORES]
+
+        if self.age() > self.max_age:
+            self._refresh_in_background()
+        return list(self._stores)
@@ -1,5 +1,11 @@
-from api_integrations import APIManager
+import api_integrations
+from api_integrations import APIManager, APIError, ResponseCache, RateLimiter, CircuitBreaker, SingleFlight, HTTPClient, LatencyTracker, parse_hedged_operations
 import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 def test_api_integrations():
     # Initialize API manager
@@ -34,5 +40,279 @@ def test_api_integrations():
     except Exception as e:
         print(f"Error creating payment token: {str(e)}")
 
+def test_response_cache():
+    cache = ResponseCache(max_items=2, default_ttl=60, ttls={"check_stock": 0.05})
+    key = cache.make_key("https://api.example.com/products/1", {"size": 9})
+    assert key == cache.make_key("https://api.example.com/products/1", {"size": "9"})
+
+    # Per-operation TTL overrides
+    assert cache.ttl_for("adidas.check_stock") == 0.05
+    assert cache.ttl_for("adidas.get_products") == 60
+
+    # TTL expiry, with the expired entry still available as a stale fallback
+    cache.set(key, {"in_stock": True}, ttl=cache.ttl_for("adidas.check_stock"))
+    assert cache.get(key) == {"in_stock": True}
+    time.sleep(0.06)
+    assert cache.get(key) is None
+    assert cache.get(key, allow_stale=True) == {"in_stock": True}
+
+    # LRU eviction bounded by max_items
+    cache.set("a", {"a": 1})
+    cache.set("b", {"b": 2})
+    cache.get("a")
+    cache.set("c", {"c": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"a": 1}
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 4 and stats["misses"] == 2
+
+    # fresh=True goes to the vendor even with a live cached response, and refreshes it
+    class CountingSession:
+        def __init__(self):
+            self.calls = 0
+        def request(self, method, url, **kwargs):
+            self.calls += 1
+            return type("Response", (), {"status_code": 200, "ok": True, "json": lambda _, n=self.calls: {"call": n}})()
+
+    http = HTTPClient(cache=ResponseCache(), hedged={})
+    http.session = CountingSession()
+    url = "https://api.nike.com/products"
+    assert http.get(url, operation="nike.get_products") == {"call": 1}
+    assert http.get(url, operation="nike.get_products") == {"call": 1}
+    assert http.get(url, operation="nike.get_products", fresh=True) == {"call": 2}
+    assert http.get(url, operation="nike.get_products") == {"call": 2}
+
+def test_rate_limiter():
+    limiter = RateLimiter("test", calls=2, period=1, store_path="")
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    # Queues until the bucket refills (one token every 0.5s), or gives up
+    assert not limiter.acquire(timeout=0.1)
+    assert limiter.acquire(timeout=1)
+
+    # Limiters backed by the same store share one budget, as separate processes would
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "rate_limits.db")
+        first = RateLimiter("nike", calls=2, period=60, store_path=store)
+        second = RateLimiter("nike", calls=2, period=60, store_path=store)
+        assert first.try_acquire()
+        assert second.try_acquire()
+        assert not first.try_acquire()
+        assert RateLimiter("puma", calls=2, period=60, store_path=store).try_acquire()
+
+    # Retries already sent are charged even past the budget, delaying later calls
+    limiter = RateLimiter("retries", calls=3, period=60, store_path="")
+    assert limiter.try_acquire()
+    limiter.charge(4)
+    assert not limiter.try_acquire()
+    assert not limiter.acquire(timeout=0.1)
+
+def test_bulk_availability():
+    api_manager = APIManager()
+    results = api_manager.check_bulk_availability([
+        ("Nike", "NK12345", "10"),
+        ("nike", "NK12345", "10"),
+        ("nike", "NK67890", "11"),
+        ("puma", "PM00000", "9"),
+        ("nike", "NK12345", "M"),
+        ("nike", "NK12345", None)
+    ])
+
+    # Duplicates collapse into one check, keyed by lowercased brand
+    assert list(results)[:3] == [("nike", "NK12345", "10"), ("nike", "NK67890", "11"), ("puma", "PM00000", "9")]
+    assert results[("nike", "NK12345", "10")]["available"] is True
+    assert results[("nike", "NK67890", "11")]["available"] is False
+    assert "error" in results[("puma", "PM00000", "9")]
+    # A size that is not a number fails only its own item
+    assert "error" in results[("nike", "NK12345", "M")]
+    assert "error" in results[("nike", "NK12345", None)]
+
+def test_live_product_fan_out():
+    class FakeBrand:
+        def __init__(self, delay=0.0, error=None):
+            self.delay, self.error = delay, error
+        def get_products(self, category=None, limit=10, fresh=False):
+            time.sleep(self.delay)
+            if self.error:
+                raise APIError(self.error)
+            return {"products": [{"id": "X1"}]}
+
+    api_manager = APIManager()
+    api_manager.brands = {
+        "nike": FakeBrand(delay=0.05),
+        "adidas": FakeBrand(delay=0.5),
+        "puma": FakeBrand(error="puma API returned 500")
+    }
+    previous = api_integrations.MOCK_API_RESPONSES
+    api_integrations.MOCK_API_RESPONSES = False
+    try:
+        # Brands are fetched concurrently: a slow one costs the timeout, not its full delay
+        started = time.monotonic()
+        results = api_manager.get_all_products(timeout=0.2)
+        assert time.monotonic() - started < 0.4
+    finally:
+        api_integrations.MOCK_API_RESPONSES = previous
+
+    # Slow and failing brands come back flagged, next to the good results
+    assert results["nike"] == {"products": [{"id": "X1"}]}
+    assert results["adidas"] == {"products": [], "error": "adidas API timed out"}
+    assert results["puma"] == {"products": [], "error": "puma API returned 500"}
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker("nike", failure_threshold=3, reset_timeout=0.1)
+
+    # Opens after consecutive failures; a success in between resets the count
+    breaker.record_failure()
+    breaker.record_success()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    # After the reset timeout exactly one trial call is let through
+    time.sleep(0.15)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # A failed trial re-opens the circuit, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"available": True}
+
+    # Identical concurrent calls share one upstream request and its result
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(single_flight.do("NK12345/10", fetch)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 10 and all(result is results[0] for result in results)
+    assert single_flight.coalesced == 9
+
+    # Once finished, the next call goes upstream again
+    single_flight.do("NK12345/10", fetch)
+    assert len(calls) == 2
+
+def test_hedged_requests():
+    class FakeResponse:
+        status_code = 200
+        ok = True
+        def __init__(self, body):
+            self.body = body
+        def json(self):
+            return self.body
+
+    class SlowFirstSession:
+        def __init__(self):
+            self.calls = 0
+        def request(self, method, url, **kwargs):
+            self.calls += 1
+            call = self.calls
+            time.sleep(1.0 if call == 1 else 0.01)
+            return FakeResponse({"call": call})
+
+    # The first request stalls past the hedge delay, so the second one answers
+    http = HTTPClient(hedged={"get_products": 0.05})
+    http.session = SlowFirstSession()
+    started = time.monotonic()
+    assert http.get("https://api.nike.com/products", operation="nike.get_products") == {"call": 2}
+    assert time.monotonic() - started < 0.5
+    assert http.hedges == 1 and http.hedge_wins == 1
+
+    # Operations that are not listed are never hedged, and hedges need a spare rate limit token
+    assert http.hedge_delay("nike.check_availability") is None
+    http.rate_limiters["adidas"] = RateLimiter("adidas", calls=1, period=3600)
+    http.session = SlowFirstSession()
+    assert http.get("https://api.adidas.com/products", operation="adidas.get_products") == {"call": 1}
+    assert http.hedges == 1
+
+    # With every hedge slot taken, slow requests just wait for the first response
+    busy = HTTPClient(hedged={"get_products": 0.05}, max_hedges=0)
+    busy.session = SlowFirstSession()
+    assert busy.get("https://api.puma.com/products", operation="puma.get_products") == {"call": 1}
+    assert busy.hedges == 0
+
+    # First requests run on a bounded pool; with no slot free they are sent inline, unhedged
+    full = HTTPClient(pool_size=2, hedged={"get_products": 0.05})
+    full.session = SlowFirstSession()
+    full._request_slots.acquire()
+    full._request_slots.acquire()
+    assert full.get("https://api.puma.com/products", operation="puma.get_products") == {"call": 1}
+    assert full.hedges == 0
+    full._request_slots.release()
+    full._request_slots.release()
+    full.session = SlowFirstSession()
+    assert full.get("https://api.puma.com/products?page=2", operation="puma.get_products") == {"call": 2}
+
+    # Per-endpoint settings come from HEDGE_OPERATIONS
+    assert parse_hedged_operations("get_products, nike.get_product_details=0.5,") == {
+        "get_products": None, "nike.get_product_details": 0.5
+    }
+
+    # Without a fixed delay an operation is hedged at its observed p95 once it has enough samples
+    tracker = LatencyTracker(window=100, min_samples=20)
+    for latency in range(19):
+        tracker.record("puma.get_products", latency / 100)
+    assert tracker.percentile("puma.get_products", 95) is None
+    tracker.record("puma.get_products", 0.19)
+    assert tracker.percentile("puma.get_products", 95) == 0.19
+
+def test_connection_limit():
+    class FakeResponse:
+        status_code = 200
+        def json(self):
+            return {}
+
+    class SlowSession:
+        def request(self, method, url, **kwargs):
+            time.sleep(0.5)
+            return FakeResponse()
+
+    # One connection: a second request waits at most its timeout for it, then fails
+    http = HTTPClient(pool_size=1)
+    http.session = SlowSession()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = executor.submit(http.get, "https://api.nike.com/products")
+        time.sleep(0.1)
+        started = time.monotonic()
+        try:
+            http.get("https://api.nike.com/products/NK12345", timeout=0.1)
+            assert False, "Expected APIError"
+        except APIError as e:
+            assert e.status_code == 503
+        assert time.monotonic() - started < 0.3
+        assert first.result() == {}
+
+    # The connection is free again once the first request is done
+    assert http.get("https://api.nike.com/products/NK12345", timeout=0.1) == {}
+
 if __name__ == "__main__":
-    test_api_integrations() 
\ No newline at end of file
+    test_api_integrations()
+    test_response_cache()
+    test_rate_limiter()
+    test_bulk_availability()
+    test_live_product_fan_out()
+    test_circuit_breaker()
+    test_single_flight()
+    test_hedged_requests()
+    test_connection_limit()
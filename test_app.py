@@ -0,0 +1,186 @@
+import atexit
+import contextlib
+import os
+import shutil
+import tempfile
+import numpy as np
+import requests
+from streamlit.testing.v1 import AppTest
+import config
+import health
+from chat_store import ChatHistory
+from deadline import Deadline
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Every file the app writes goes here instead of the repo's data/ and models/
+TEST_DIR = tempfile.mkdtemp(prefix="quickbasket-test-")
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+SETTINGS = {
+    "CHAT_STORE_FILE": os.path.join(TEST_DIR, "chat_history.db"),
+    "MODEL_ARTIFACT_DIR": os.path.join(TEST_DIR, "models"),
+    "STORE_DIRECTORY_FILE": os.path.join(TEST_DIR, "store_directory.json")
+}
+
+def offline_request(session, method, url, **kwargs):
+    raise requests.ConnectionError(f"No network in tests: {method} {url}")
+
+@contextlib.contextmanager
+def isolated_app(**overrides):
+    """Run the app against TEST_DIR, with no network access and no health probe threads"""
+    settings = {**SETTINGS, **overrides}
+    saved = {name: getattr(config, name) for name in settings}
+    saved_request, saved_start = requests.Session.request, health.VendorHealthMonitor.start
+    for name, value in settings.items():
+        setattr(config, name, value)
+    requests.Session.request = offline_request
+    health.VendorHealthMonitor.start = lambda monitor: None
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+        requests.Session.request, health.VendorHealthMonitor.start = saved_request, saved_start
+
+def load_app():
+    """Import app.py as a module (Streamlit bare mode), set up under isolated_app()"""
+    with isolated_app():
+        import app
+    return app
+
+def test_model_names_need_a_brand():
+    app = load_app()
+    import streamlit as st
+
+    # "react" on its own is an ordinary word, not the Nike React
+    assert app.apply_intent_rules("where is my order? please react quickly")[0] == "Order Tracking"
+    assert app.apply_intent_rules("is shipping free for react runners")[0] == "Shipping Information"
+    intent, _, entities, _ = app.apply_intent_rules("nike react size 9")
+    assert intent == "Product Availability" and entities['models'] == ['react']
+
+    # Catalog names are matched in full, and without their brand only next to a brand
+    st.session_state.catalog_version = "test-free"
+    st.session_state.product_database = {'nike': {'Nike Free': {'colors': ['black']}}}
+    try:
+        assert app.apply_intent_rules("is shipping free?")[0] == "Shipping Information"
+        assert app.extract_entities("do you have the nike free")['models'] == ['free']
+        assert app.extract_entities("nike, is it free")['models'] == ['free']
+    finally:
+        del st.session_state.catalog_version, st.session_state.product_database
+
+class StubClassifier:
+    """Scores every message with fixed probabilities and records each predict_proba call"""
+    classes_ = np.array(["Product Inquiry", "Returns & Exchanges"])
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[0.2, 0.8] if "meaning" in text else [0.9, 0.1] for text in texts])
+
+def test_classify_batch():
+    app = load_app()
+    weather = "tell me something interesting about the weather"
+    meaning = "what is the meaning of life"
+    texts = [weather, "where is my order", meaning, weather]
+
+    classifier = StubClassifier()
+    results = app.classify_batch(texts, classifier)
+    # One model call per batch; the duplicate is scored once and the rule hit never reaches the model
+    assert classifier.calls == [[weather, meaning]]
+    assert [intent for intent, _, _ in results] == [
+        "Product Inquiry", "Order Tracking", "Returns & Exchanges", "Product Inquiry"
+    ]
+    assert results[0] == results[3] and results[2][1] == 0.8
+
+    # Out of time: rule hits still count, the model is skipped and the rest are unrecognised
+    classifier = StubClassifier()
+    deadline = Deadline(0)
+    results = app.classify_batch(texts, classifier, deadline)
+    assert classifier.calls == []
+    assert "intent model" in deadline.skipped
+    assert [intent for intent, _, _ in results] == [
+        "Unknown/Other", "Order Tracking", "Unknown/Other", "Unknown/Other"
+    ]
+
+def test_rendered_chat():
+    app = load_app()
+    import streamlit as st
+
+    rendered = []
+    def render(message):
+        rendered.append(message['content'])
+        return message['content']
+
+    def check(expected, newly_rendered):
+        rendered.clear()
+        assert app.get_rendered_chat() == expected
+        assert rendered == newly_rendered
+
+    saved_render = app.render_chat_message
+    app.render_chat_message = render
+    st.session_state.chat_history = history = ChatHistory(None, "test", max_messages=3)
+    st.session_state.pop('chat_render_cache', None)
+    try:
+        # Appending renders only the new turns
+        history.append({'role': 'user', 'content': 'a'})
+        check(['a'], ['a'])
+        history.append({'role': 'assistant', 'content': 'b'})
+        check(['a', 'b'], ['b'])
+        check(['a', 'b'], [])
+
+        # Turns rolling off the front of the buffer are dropped, not re-rendered
+        history.append({'role': 'user', 'content': 'c'})
+        check(['a', 'b', 'c'], ['c'])
+        history.append({'role': 'assistant', 'content': 'd'})
+        check(['b', 'c', 'd'], ['d'])
+
+        # Removing a turn in the middle re-renders from that point on
+        history.retain(lambda message: message['content'] != 'c')
+        check(['b', 'd'], ['d'])
+
+        # After a clear only the new conversation is shown
+        history.clear()
+        history.append({'role': 'user', 'content': 'e'})
+        check(['e'], ['e'])
+    finally:
+        app.render_chat_message = saved_render
+        del st.session_state.chat_history, st.session_state.chat_render_cache
+
+def test_model_artifacts():
+    app = load_app()
+    os.makedirs(app.MODEL_ARTIFACT_DIR, exist_ok=True)
+    stale = app.get_model_artifact_path("old")
+    in_progress = f"{app.get_model_artifact_path('other')}.1234.tmp"
+    for path in (stale, in_progress):
+        with open(path, "wb") as f:
+            f.write(b"")
+
+    # Saving a version removes the artifacts of every other version, but not another writer's temp file
+    path = app.save_model_artifact({"weights": [1, 2, 3]}, "new")
+    assert path == app.get_model_artifact_path("new")
+    assert not os.path.exists(stale) and os.path.exists(in_progress)
+    assert app.load_model_artifact("new") == {"weights": [1, 2, 3]}
+    os.remove(in_progress)
+
+def test_reply_with_expired_deadline():
+    # No time budget at all: every optional stage is skipped, but the reply still comes back
+    with isolated_app(RESPONSE_DEADLINE=0):
+        at = AppTest.from_file(APP_FILE, default_timeout=120)
+        at.run()
+        at.text_input(key="user_input").input("do you have nike air max in size 10").run()
+
+    assert not at.exception
+    reply = at.session_state.chat_history[-1]['content']
+    # Stock and price come from the catalog snapshot; recommendations are left out
+    assert "in stock" in reply and "Size 10 is available" in reply and "$129.99" in reply
+    assert "You might also like" not in reply
+
+if __name__ == "__main__":
+    test_model_names_need_a_brand()
+    test_classify_batch()
+    test_rendered_chat()
+    test_model_artifacts()
+    test_reply_with_expired_deadline()
+    print("App tests passed")
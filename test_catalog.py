@@ -0,0 +1,78 @@
+from catalog import CatalogIndex, ProductCatalog, freeze
+
+PRODUCTS = freeze({
+    'nike': {
+        'Nike Air Max': {'price': 129.99, 'sizes': [7, 8, 9, 10, 11], 'colors': ['black', 'white'], 'in_stock': True},
+        'Nike React': {'price': 149.99, 'sizes': [8, 9, 10], 'colors': ['blue', 'gray'], 'in_stock': True},
+        'Nike Air Maxine': {'price': 99.99, 'sizes': [6, 7], 'colors': ['pink'], 'in_stock': False}
+    },
+    'adidas': {
+        'Adidas Ultraboost': {'price': 179.99, 'sizes': [7, 8, 9, 10, 11, 12], 'colors': ['black', 'blue'], 'in_stock': True}
+    }
+})
+
+def test_catalog_query():
+    index = CatalogIndex(PRODUCTS)
+    models = lambda rows: [model for _, model, _ in rows]
+
+    # No filters returns everything in catalog order
+    assert models(index.query()) == ['Nike Air Max', 'Nike React', 'Nike Air Maxine', 'Adidas Ultraboost']
+
+    # Price bounds are inclusive and results keep catalog order
+    assert models(index.query(min_price=99.99, max_price=149.99)) == ['Nike Air Max', 'Nike React', 'Nike Air Maxine']
+    assert models(index.query(brand='nike', in_stock=True)) == ['Nike Air Max', 'Nike React']
+    assert models(index.query(size=12)) == ['Adidas Ultraboost']
+    assert models(index.query(color='Blue', exclude_brand='adidas')) == ['Nike React']
+    assert index.query(brand='puma') == []
+
+def test_catalog_find_model():
+    index = CatalogIndex(PRODUCTS)
+
+    assert index.find_model('Nike', 'air max')[0] == 'Nike Air Max'
+
+    # Model names match as substrings, in catalog order
+    assert [name for name, _ in index.matching_models('nike', 'max')] == ['Nike Air Max', 'Nike Air Maxine']
+    assert [name for name, _ in index.matching_models('nike', 'e')] == ['Nike Air Max', 'Nike React', 'Nike Air Maxine']
+    assert index.find_model('nike', 'maxi')[0] == 'Nike Air Maxine'
+    assert index.find_model('adidas', 'react') is None
+    assert index.find_model('puma', 'rs-x') is None
+
+class FlakyAPIManager:
+    """Returns one product on the first call and a vendor error afterwards"""
+    def __init__(self):
+        self.calls = 0
+        self.fresh = []
+
+    def get_all_products(self, fresh=False):
+        self.calls += 1
+        self.fresh.append(fresh)
+        if self.calls == 1:
+            return {'nike': {'products': [
+                {'id': 'NK1', 'name': 'Nike Air Max', 'price': 129.99, 'sizes': [9], 'colors': ['black'], 'in_stock': True}
+            ]}}
+        return {'nike': {'products': [], 'error': 'nike API timed out'}}
+
+def test_catalog_keeps_last_good_brand():
+    api_manager = FlakyAPIManager()
+    catalog = ProductCatalog(api_manager)
+    assert catalog.age() is None
+
+    first = catalog.get()
+    assert list(first.products['nike']) == ['Nike Air Max']
+    assert catalog.brand_errors == {}
+
+    # A failed refresh still swaps in a new snapshot, but with the last good products
+    catalog.refresh()
+    assert catalog.snapshot is not first
+    assert list(catalog.snapshot.products['nike']) == ['Nike Air Max']
+    assert catalog.brand_errors == {'nike': 'nike API timed out'}
+    assert catalog.age() >= 0
+
+    # Refreshes never reuse cached vendor responses
+    assert api_manager.fresh == [True, True]
+
+if __name__ == "__main__":
+    test_catalog_query()
+    test_catalog_find_model()
+    test_catalog_keeps_last_good_brand()
+    print("Catalog tests passed")
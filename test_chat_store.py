@@ -0,0 +1,28 @@
+from chat_store import ChatStore, ChatHistory
+import os
+import tempfile
+
+def test_chat_history():
+    store = ChatStore(os.path.join(tempfile.mkdtemp(), "chat.db"))
+    history = ChatHistory(store, "session-1", max_messages=4)
+    for i in range(10):
+        history.append({'role': 'user' if i % 2 == 0 else 'assistant', 'content': f"message {i}"})
+
+    # Only the last few turns stay in memory; older ones are compacted into a summary
+    assert [m['content'] for m in history] == ["message 6", "message 7", "message 8", "message 9"]
+    assert history.summary.startswith("4 earlier messages.")
+    assert '"message 0"' in history.summary and '"message 1"' not in history.summary
+
+    # A new session with the same id resumes the conversation
+    resumed = ChatHistory(ChatStore(store.path), "session-1", max_messages=4)
+    assert list(resumed) == list(history)
+    assert resumed.summary == history.summary
+    assert len(ChatHistory(store, "session-2", max_messages=4)) == 0
+
+    history.clear()
+    resumed = ChatHistory(store, "session-1", max_messages=4)
+    assert len(resumed) == 0 and resumed.summary is None
+
+if __name__ == "__main__":
+    test_chat_history()
+    print("Chat store tests passed")
@@ -0,0 +1,23 @@
+import time
+from deadline import Deadline
+
+def test_deadline():
+    deadline = Deadline(0.2)
+    assert not deadline.expired()
+    assert deadline.has(0.1)
+    assert not deadline.has(1)
+    assert 0 < deadline.remaining() <= 0.2
+
+    # Skipped stages are recorded once each
+    deadline.skip("recommendations")
+    deadline.skip("recommendations")
+    assert deadline.skipped == ["recommendations"]
+
+    time.sleep(0.25)
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+    assert deadline.elapsed() >= 0.2
+
+if __name__ == "__main__":
+    test_deadline()
+    print("Deadline tests passed")
@@ -0,0 +1,92 @@
+import time
+from types import SimpleNamespace
+import requests
+from health import VendorHealth, VendorHealthMonitor, VENDOR_NAMES
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+class FakeSession:
+    """HEAD answers by URL: a status code, or an exception to raise"""
+    def __init__(self, answers):
+        self.answers = answers
+        self.heads = []
+
+    def head(self, url, timeout=None, allow_redirects=True):
+        self.heads.append(url)
+        answer = self.answers[url]
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeResponse(answer)
+
+class FakeAPIManager:
+    """No brands, so every vendor is probed over HTTP"""
+    brands = {}
+    config = SimpleNamespace(**{f"{vendor.upper()}_BASE_URL": f"https://{vendor}.test" for vendor in VENDOR_NAMES})
+
+def test_vendor_health():
+    health = VendorHealth(window=3)
+    assert health.status() == {"healthy": None, "checked_at": None}
+
+    health.record(True, 0.1)
+    health.record(False, 0.5, "HTTP 503")
+    health.record(True, 0.2)
+    status = health.status()
+    assert status["healthy"] is True and status["samples"] == 3
+    assert status["latency_ms"] == 200  # Median
+    assert status["error_rate"] == 1 / 3
+    assert status["last_error"] is None
+
+    # Only the last `window` probes count
+    health.record(False, 0.3, "timeout")
+    status = health.status()
+    assert status["healthy"] is False and status["last_error"] == "timeout"
+    assert status["latency_ms"] == 300 and status["error_rate"] == 2 / 3
+
+def test_probe():
+    monitor = VendorHealthMonitor(FakeAPIManager(), interval=0.05, timeout=1, window=5)
+    monitor.session = FakeSession({
+        "https://nike.test": 200,
+        "https://adidas.test": 404,  # Reachable, just nothing at the root
+        "https://puma.test": 503,
+        "https://google_maps.test": requests.ConnectionError("connection refused"),
+        "https://google_pay.test": 200
+    })
+    assert all(status["healthy"] is None for status in monitor.status().values())
+
+    assert monitor.probe("nike") and monitor.probe("adidas")
+    assert not monitor.probe("puma")
+    assert not monitor.probe("google_maps")
+
+    status = monitor.status()
+    assert status["nike"]["healthy"] and status["adidas"]["healthy"]
+    assert status["puma"]["healthy"] is False and status["puma"]["last_error"] == "HTTP 503"
+    assert status["google_maps"]["healthy"] is False and "connection refused" in status["google_maps"]["last_error"]
+    assert status["google_pay"]["healthy"] is None  # Not probed yet
+
+def test_monitor_threads():
+    monitor = VendorHealthMonitor(FakeAPIManager(), interval=0.05, timeout=1, window=5)
+    monitor.session = FakeSession({f"https://{vendor}.test": 200 for vendor in VENDOR_NAMES})
+
+    monitor.start()
+    monitor.start()  # Already running: no second set of threads
+    assert len(monitor._threads) == len(VENDOR_NAMES)
+    deadline = time.time() + 5
+    while any(status["healthy"] is None for status in monitor.status().values()) and time.time() < deadline:
+        time.sleep(0.05)
+    assert all(status["healthy"] for status in monitor.status().values())
+
+    monitor.stop()
+    for thread in monitor._threads.values():
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+    probes = len(monitor.session.heads)
+    time.sleep(0.2)
+    assert len(monitor.session.heads) == probes  # No probes after stop()
+
+if __name__ == "__main__":
+    test_vendor_health()
+    test_probe()
+    test_monitor_threads()
+    print("Health tests passed")
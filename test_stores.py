@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from stores import StoreIndex, StoreDirectory, DEFAULT_STORES
+
+STORES = [
+    {"name": "Times Square", "location": [40.7580, -73.9855]},
+    {"name": "Brooklyn", "location": [40.6782, -73.9442]},
+    {"name": "Newark", "location": [40.7357, -74.1724]},
+    {"name": "Boston", "location": [42.3601, -71.0589]},
+    {"name": "No Location"}
+]
+
+def test_store_index():
+    index = StoreIndex(STORES)
+    assert len(index) == 4  # Stores without a location are skipped
+
+    # From lower Manhattan
+    nearest = index.nearest(40.7128, -74.0060, k=2)
+    assert [store["name"] for store, _ in nearest] == ["Times Square", "Brooklyn"]
+    assert 0 < nearest[0][1] < nearest[1][1] < 10
+
+    nearby = index.within_radius(40.7128, -74.0060, radius_km=20)
+    assert [store["name"] for store, _ in nearby] == ["Times Square", "Brooklyn", "Newark"]
+    assert index.within_radius(40.7128, -74.0060, radius_km=1) == []
+
+    # Asking for more stores than exist returns them all
+    assert len(index.nearest(40.7128, -74.0060, k=10)) == 4
+    assert StoreIndex([]).nearest(40.7128, -74.0060) == []
+
+class FakeMaps:
+    """Two nearby stores, or an outage while `down` is set"""
+    def __init__(self, down=False):
+        self.down = down
+        self.searches = 0
+
+    def find_nearby_stores(self, latitude, longitude):
+        self.searches += 1
+        if self.down:
+            raise ConnectionError("Maps is down")
+        return {'results': [
+            {'place_id': 'ts', 'geometry': {'location': {'lat': 40.7580, 'lng': -73.9855}}},
+            {'place_id': 'bk', 'geometry': {'location': {'lat': 40.6782, 'lng': -73.9442}}}
+        ]}
+
+    def get_store_details(self, place_id):
+        return {'result': {'name': {'ts': 'Times Square', 'bk': 'Brooklyn'}[place_id]}}
+
+class FakeAPIManager:
+    def __init__(self, maps):
+        self.google_maps = maps
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+def test_store_directory():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stores.json')
+
+        # Maps down and nothing saved: only the first call waits on Maps
+        maps = FakeMaps(down=True)
+        directory = StoreDirectory(FakeAPIManager(maps), path=path, retry_interval=0.1)
+        assert directory.get() == DEFAULT_STORES
+        assert directory.get() == DEFAULT_STORES
+        assert maps.searches == 1
+
+        # Once the retry interval has passed, a background retry picks the stores up
+        maps.down = False
+        time.sleep(0.15)
+        directory.get()
+        for _ in range(50):
+            if directory.age() is not None:
+                break
+            time.sleep(0.02)
+        assert [store['name'] for store in directory.get()] == ['Times Square', 'Brooklyn']
+        assert directory.index.nearest(40.7128, -74.0060)[0][0]['name'] == 'Times Square'
+
+        # A new directory (e.g. after a restart) loads the saved file without calling Maps
+        maps = FakeMaps()
+        reloaded = StoreDirectory(FakeAPIManager(maps), path=path)
+        assert [store['name'] for store in reloaded.get()] == ['Times Square', 'Brooklyn']
+        assert maps.searches == 0
+
+if __name__ == "__main__":
+    test_store_index()
+    test_store_directory()
+    print("Store tests passed")
@@ -0,0 +1,88 @@
+from text_processing import KeywordMatcher, EntityExtractor, TypoCorrector, is_css_content
+from bench_text_processing import check_scaling
+
+def test_keyword_matcher():
+    matcher = KeywordMatcher({
+        'order': ['order', 'delivery'],
+        'shipping': ['ship', 'shipping', 'delivery time'],
+        'greeting': ['hi', 'hello']
+    })
+
+    # Overlapping and shared keywords are all reported
+    matched = matcher.match("Hi, what is the DELIVERY TIME for shipping?")
+    assert set(matched) == {'order', 'shipping', 'greeting'}
+
+    # Families report their earliest start position
+    assert matched['greeting'] == 0
+    assert matcher.match("oh hello")['greeting'] == 3
+
+    assert matcher.match("just browsing today") == {}
+
+def test_entity_extractor():
+    extractor = EntityExtractor({
+        'brands': {'nike': ['nike'], 'puma': ['puma']},
+        'models': {'air max': ['air max', 'airmax'], 'rs-x': ['rs-x', 'rs x']}
+    })
+
+    entities = extractor.extract("Puma RS-X or Nike AIRMAX?")
+    assert entities == {'brands': ['puma', 'nike'], 'models': ['rs-x', 'air max']}
+
+    # Patterns only match whole words
+    assert extractor.extract("pumas and nikes") == {'brands': [], 'models': []}
+
+    # Rebuilding from the catalog adds new values without touching the original
+    extended = extractor.extend({'models': {'react': ['react']}, 'colors': {'blue': ['blue']}})
+    assert extended.extract("blue nike react") == {
+        'brands': ['nike'], 'models': ['react'], 'colors': ['blue']
+    }
+    assert extractor.extract("nike react")['models'] == []
+
+def test_typo_corrector():
+    corrector = TypoCorrector(
+        {'adidas': ['addidas'], 'air max': ['air macks', 'airmaks']},
+        fuzzy_terms=['adidas', 'air max', 'stan smith']
+    )
+
+    # Known variants, including phrases and words with trailing punctuation
+    assert corrector.correct("Addidas air macks?") == (
+        "adidas air max?", {'addidas': 'adidas', 'air macks': 'air max'}
+    )
+
+    # Unseen misspellings within edit distance of a fuzzy term
+    assert corrector.correct("stan smiht") == ("stan smith", {'stan smiht': 'stan smith'})
+
+    # Ordinary and short words are left alone
+    assert corrector.correct("I like bikes") == ("i like bikes", {})
+
+    # A brand followed by a size is not fuzzy-matched as one word
+    corrector = TypoCorrector({}, fuzzy_terms=['adidas', 'jordan', 'air max'])
+    assert corrector.correct("do you have adidas 9") == ("do you have adidas 9", {})
+    assert corrector.correct("size 9 jordan 8") == ("size 9 jordan 8", {})
+
+def test_is_css_content():
+    # Ordinary chat text, including colons and parentheses
+    assert not is_css_content("Do you have Nike Air Max in size 10?")
+    assert not is_css_content("Hours: 9 AM - 9 PM (Mon-Sat). Phone: 555-123-4567.")
+    assert not is_css_content("")
+    assert not is_css_content(None)
+
+    assert is_css_content(".stButton > button { color: white; }")
+    assert is_css_content("@media (max-width: 600px)")
+    assert is_css_content("color: red;")
+    assert is_css_content("div { color:")
+    assert is_css_content("{{ ;;;;;; }}")
+
+    # Long inputs without markup stay fast and are not flagged
+    assert not is_css_content("x" * 100000 + ":")
+
+def test_is_css_content_scaling():
+    # Time per character stays flat as messages grow (see bench_text_processing.py)
+    check_scaling()
+
+if __name__ == "__main__":
+    test_keyword_matcher()
+    test_entity_extractor()
+    test_typo_corrector()
+    test_is_css_content()
+    test_is_css_content_scaling()
+    print("Text processing tests passed")
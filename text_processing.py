@@ -0,0 +1,276 @@
+import re
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Keyword Matching
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword of every family in one pass.
+
+    Keywords are plain substrings (no word boundaries), grouped into named
+    families. Overlapping matches are all reported, so a keyword shared by two
+    families, or a keyword inside a longer one, is never hidden.
+    """
+    def __init__(self, families: Dict[Hashable, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[Hashable, int]]] = [[]]  # (family, keyword length)
+        self.families = list(families)
+
+        for family, keywords in families.items():
+            for keyword in keywords:
+                self._add(keyword.lower(), family)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, family: Hashable):
+        if not keyword:
+            return
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        if (family, len(keyword)) not in self._out[node]:
+            self._out[node].append((family, len(keyword)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # Inherit the outputs of the longest proper suffix
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Yield (start, end, family) for every keyword occurrence in already-lowercased text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for family, length in out[node]:
+                yield index - length + 1, index + 1, family
+
+    def match(self, text: str) -> Dict[Hashable, int]:
+        """Return {family: earliest start index} for every family found in text"""
+        matched: Dict[Hashable, int] = {}
+        for start, _, family in self.iter_matches(text.lower()):
+            if start < matched.get(family, len(text)):
+                matched[family] = start
+        return matched
+
+# Entity Extraction
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Same test as the regex \\b assertion at text[index]"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+class EntityExtractor:
+    """Gazetteer lookup for brands, models, colors, etc. in one pass per message.
+
+    Each gazetteer maps an entity type to {canonical value: [patterns]}. Patterns
+    only match on word boundaries, like re.search(r'\\b' + pattern + r'\\b', text).
+    Extractors are immutable; extend() returns a rebuilt copy.
+    """
+    def __init__(self, gazetteers: Dict[str, Dict[str, Iterable[str]]]):
+        self.gazetteers = {
+            entity_type: {canonical: list(patterns) for canonical, patterns in entries.items()}
+            for entity_type, entries in gazetteers.items()
+        }
+        self._matcher = KeywordMatcher({
+            (entity_type, canonical): patterns
+            for entity_type, entries in self.gazetteers.items()
+            for canonical, patterns in entries.items()
+        })
+
+    def extend(self, gazetteers: Dict[str, Dict[str, Iterable[str]]]) -> 'EntityExtractor':
+        """Return a new extractor with extra canonical values and patterns merged in"""
+        merged = {entity_type: {c: list(p) for c, p in entries.items()}
+                  for entity_type, entries in self.gazetteers.items()}
+        for entity_type, entries in gazetteers.items():
+            target = merged.setdefault(entity_type, {})
+            for canonical, patterns in entries.items():
+                known = target.setdefault(canonical, [])
+                known.extend(p for p in patterns if p not in known)
+        return EntityExtractor(merged)
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Return {entity type: canonical values in order of first mention}"""
+        text = text.lower()
+        found: Dict[str, List[str]] = {entity_type: [] for entity_type in self.gazetteers}
+        for start, end, (entity_type, canonical) in self._matcher.iter_matches(text):
+            if canonical in found[entity_type]:
+                continue
+            if _is_word_boundary(text, start) and _is_word_boundary(text, end):
+                found[entity_type].append(canonical)
+        return found
+
+# Typo Correction
+_TOKEN_PARTS = re.compile(r'^(\W*)(.*?)(\W*)$', re.DOTALL)
+
+def _deletes(term: str, distance: int) -> Set[str]:
+    """All strings reachable from term by deleting up to `distance` characters"""
+    results = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        results |= frontier
+    return results
+
+def edit_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein distance (optimal string alignment)"""
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+class TypoCorrector:
+    """Phrase-aware typo correction with an exact index and a fuzzy fallback.
+
+    Known misspellings (single words or phrases such as "air macks") are looked
+    up in a variant -> canonical hash index. Tokens that are not known variants
+    are checked against `fuzzy_terms` through a SymSpell-style deletion index,
+    allowing one edit for words under 8 characters and up to
+    `max_edit_distance` edits for longer ones.
+    """
+    def __init__(self, corrections: Dict[str, Iterable[str]], fuzzy_terms: Iterable[str] = (),
+                 max_edit_distance: int = 2, min_fuzzy_length: int = 5):
+        self.max_edit_distance = max_edit_distance
+        self.min_fuzzy_length = min_fuzzy_length
+
+        # Exact index: variant tokens -> canonical term
+        self._variants: Dict[Tuple[str, ...], str] = {}
+        for canonical, variants in corrections.items():
+            for variant in variants:
+                self._variants.setdefault(tuple(variant.lower().split()), canonical)
+        self._max_variant_words = max((len(v) for v in self._variants), default=1)
+
+        # Deletion index: delete-variant -> fuzzy terms it can come from
+        self._fuzzy_terms = {term.lower() for term in fuzzy_terms}
+        self._deletion_index: Dict[str, Set[str]] = {}
+        for term in self._fuzzy_terms:
+            for deleted in _deletes(term, max_edit_distance):
+                self._deletion_index.setdefault(deleted, set()).add(term)
+        self._max_fuzzy_words = max((len(t.split()) for t in self._fuzzy_terms), default=0)
+
+    def lookup(self, phrase: str) -> Optional[str]:
+        """Closest fuzzy term within the allowed edit distance, or None"""
+        if len(phrase) < self.min_fuzzy_length or phrase in self._fuzzy_terms:
+            return None
+        allowed = min(self.max_edit_distance, 1 if len(phrase) < 8 else 2)
+        candidates: Set[str] = set()
+        for deleted in _deletes(phrase, allowed):
+            candidates |= self._deletion_index.get(deleted, set())
+        # Only terms with as many words, so an edit never swallows a whole token
+        words = len(phrase.split())
+        candidates = {term for term in candidates if len(term.split()) == words}
+        best, best_distance = None, allowed + 1
+        for term in sorted(candidates):
+            distance = edit_distance(phrase, term)
+            if distance < best_distance:
+                best, best_distance = term, distance
+        return best
+
+    def correct(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Return (lowercased corrected text, {typo: correction})"""
+        parts = [_TOKEN_PARTS.match(token).groups() for token in text.lower().split()]
+        corrected: List[str] = []
+        corrections: Dict[str, str] = {}
+
+        i = 0
+        while i < len(parts):
+            replacement = None
+            longest = min(max(self._max_variant_words, self._max_fuzzy_words), len(parts) - i)
+            for n in range(longest, 0, -1):
+                window = parts[i:i + n]
+                # Phrases may not span punctuation between their words
+                if any(p[2] for p in window[:-1]) or any(p[0] for p in window[1:]):
+                    continue
+                words = tuple(p[1] for p in window)
+                phrase = ' '.join(words)
+                correction = self._variants.get(words)
+                if correction is None and n <= self._max_fuzzy_words:
+                    correction = self.lookup(phrase)
+                if correction is not None and correction != phrase:
+                    corrections[phrase] = correction
+                    replacement = window[0][0] + correction + window[-1][2]
+                    i += n
+                    break
+            if replacement is None:
+                replacement = ''.join(parts[i])
+                i += 1
+            corrected.append(replacement)
+
+        return ' '.join(corrected), corrections
+
+# Markup Detection
+CSS_INDICATORS = [
+    "@import url(",
+    "@keyframes",
+    "@media",
+    "font-family:",
+    "margin:",
+    "padding:",
+    "display: flex",
+    "position: absolute",
+    "background-color:",
+    "linear-gradient("
+]
+
+# Every CSS pattern needs at least one of these characters
+_CSS_CHARS = re.compile(r'[{};:@(]')
+_CSS_INDICATORS = '|'.join(re.escape(indicator) for indicator in CSS_INDICATORS)
+# Indicators, `.class {`, `#id {`, `@rule {`, `element { property:` and a trailing `}`.
+# `\w\s*\{` matches wherever `\w+\s*\{` does, without backtracking through long words.
+_CSS_MARKUP = re.compile(_CSS_INDICATORS + r'|\}\s*$')
+_CSS_MARKUP_WITH_BRACES = re.compile(_CSS_INDICATORS + r'|[.#@]\w+\s*\{|\w\s*\{\s*\w+:|\}\s*$')
+# `property: value;` -- scanned once per declaration instead of once per colon
+_CSS_DECLARATION = re.compile(r'(?:^|[;{])[^;{:]*:[^;{]+;')
+
+def is_css_content(text) -> bool:
+    """Check if the text appears to be CSS content.
+
+    Ordinary chat text without any of `{};:@(` is rejected by a single
+    character-class scan; everything else is checked with a few precompiled
+    patterns, each linear in the length of the text.
+    """
+    if not text or not isinstance(text, str):
+        return False
+    if not _CSS_CHARS.search(text):
+        return False
+
+    opening_braces = text.count('{')
+    if (_CSS_MARKUP_WITH_BRACES if opening_braces else _CSS_MARKUP).search(text):
+        return True
+    semicolons = text.count(';')
+    if semicolons and ':' in text and _CSS_DECLARATION.search(text):
+        return True
+
+    # Balanced braces and many semicolons, or long text with CSS-like punctuation
+    if opening_braces > 1 and opening_braces == text.count('}') and semicolons > 5:
+        return True
+    if len(text) > 200 and (semicolons > 10 or (opening_braces and '}' in text)):
+        return True
+    return False
+